@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from anchor_panel import TIMEFRAME_MS, to_ms
+
+# As-of alignment of other series onto one target timestamp grid.
+#
+# The target's open times are converted to one sorted int64 (ms) index. Every
+# source series is mapped onto it with a single searchsorted, giving for each
+# target candle the row of the last source bar that had closed by the time the
+# target candle closed. Index maps are cached per source grid, so all columns
+# (and all anchors sharing a panel) reuse one map, and a source on the same grid
+# as the target is returned as-is instead of being copied. The strategy engine
+# aligns anchors the same way (anchor_rows in strategy-template.py);
+# replay_check.check_alignment verifies that both agree.
+
+def _asof_rows(source_ts, target_ts):
+    """
+    For each sorted target timestamp, the row of the last sorted source timestamp
+    at or before it, -1 if there is none.
+    """
+    return np.searchsorted(source_ts, target_ts, side="right") - 1
+
+class TimestampAligner:
+    """
+        aligner = TimestampAligner(candles_target["timestamp"], "1H")
+        close_btc = aligner.align(candles_anchor, "close_BTC_1H")
+    """
+    def __init__(self, timestamps, timeframe="1H"):
+        self.index = to_ms(timestamps)
+        self.timeframe = timeframe
+        self._maps = {}
+
+    def _closes(self, ts_ms, timeframe):
+        return ts_ms + TIMEFRAME_MS[timeframe] if timeframe is not None else ts_ms
+
+    def index_map(self, timestamps, timeframe=None):
+        """
+        Row of the source aligned to each target candle, -1 where no source bar
+        has closed yet; None when the source grid is the target grid. With
+        timeframe=None source rows are matched as-of their open time (use this
+        for panels such as candles_anchor, whose rows are already lookahead-free).
+        """
+        ts_ms = to_ms(timestamps)
+        key = (timeframe, len(ts_ms), int(ts_ms[0]) if len(ts_ms) else None, int(ts_ms[-1]) if len(ts_ms) else None)
+        cached = self._maps.get(key)
+        if cached is not None and np.array_equal(cached[0], ts_ms):
+            return cached[1]
+        same_grid = timeframe in (None, self.timeframe) and np.array_equal(ts_ms, self.index)
+        if same_grid:
+            rows = None
+        elif timeframe is None:
+            rows = _asof_rows(ts_ms, self.index)
+        else:
+            rows = _asof_rows(self._closes(ts_ms, timeframe), self._closes(self.index, self.timeframe))
+        self._maps[key] = (ts_ms, rows)
+        return rows
+
+    def take(self, values, rows):
+        """
+        values[rows] along the first axis with NaN where rows < 0. Returns `values`
+        itself for an identical grid and a slice view for a contiguous run of rows.
+        """
+        values = np.asarray(values)
+        if rows is None:
+            return values
+        if len(rows) and rows[0] >= 0 and np.all(np.diff(rows) == 1):
+            return values[rows[0]:rows[-1] + 1]
+        out = values[np.maximum(rows, 0)].astype(np.float64)
+        out[rows < 0] = np.nan
+        return out
+
+    def align(self, frame: pd.DataFrame, columns, timeframe=None):
+        """
+        Aligns one column (returns a 1D array) or a list of columns (returns a
+        (candles, columns) array gathered in one pass) of a frame with a `timestamp`.
+        """
+        rows = self.index_map(frame["timestamp"], timeframe)
+        if isinstance(columns, str):
+            return self.take(frame[columns].to_numpy(), rows)
+        return self.take(frame[list(columns)].to_numpy(), rows)
+
+    def align_frame(self, frame: pd.DataFrame, columns=None, timeframe=None) -> pd.DataFrame:
+        """
+        The frame's columns (all but `timestamp` by default) on the target timestamps.
+        """
+        columns = [c for c in frame.columns if c != "timestamp"] if columns is None else list(columns)
+        aligned = pd.DataFrame(self.align(frame, columns, timeframe), columns=columns, copy=False)
+        aligned.insert(0, "timestamp", pd.to_datetime(self.index, unit="ms"))
+        return aligned
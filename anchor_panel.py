@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Builds the `<field>_<SYM>_<TF>` candles_anchor layout from base candles.
+#
+# Every higher-timeframe bar is aggregated from the base candles (open=first,
+# high=max, low=min, close=last, volume=sum) and only appears on the rows at or
+# after the base candle that completes it, so a 4H/1D value is never visible
+# before that bar has closed. The whole panel is one contiguous 2D block.
+
+FIELDS = ("open", "high", "low", "close", "volume")
+TIMEFRAMES = ("1H", "4H", "1D")
+TIMEFRAME_MS = {
+    "1H": 3_600_000,
+    "4H": 14_400_000,
+    "1D": 86_400_000,
+}
+
+_REDUCERS = {
+    "open": None,            # first value of the bucket
+    "high": np.maximum,
+    "low": np.minimum,
+    "close": None,           # last value of the bucket
+    "volume": np.add,
+}
+
+def to_ms(timestamps) -> np.ndarray:
+    return np.asarray(timestamps, dtype="datetime64[ms]").astype(np.int64)
+
+def panel_columns(symbols, timeframes=TIMEFRAMES, fields=FIELDS) -> list:
+    return [f"{field}_{symbol}_{tf}" for symbol in symbols for tf in timeframes for field in fields]
+
+def _closed_bar_index(ts_ms: np.ndarray, base_ms: int, tf_ms: int):
+    """
+    Groups base rows into `tf_ms` buckets. Returns (bucket start rows, bucket end
+    rows, row -> index of the latest bucket that has closed by that row or -1).
+    """
+    bucket = ts_ms // tf_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts_ms)] - 1
+    # A bucket is closed once its final base candle has closed.
+    closed = ts_ms[ends] + base_ms >= (bucket[starts] + 1) * tf_ms
+    closed_groups = np.flatnonzero(closed)
+    latest = np.searchsorted(ends[closed_groups], np.arange(len(ts_ms)), side="right") - 1
+    row_to_group = np.where(latest >= 0, closed_groups[np.maximum(latest, 0)], -1)
+    return starts, ends, row_to_group
+
+def build_anchor_panel(timestamps, base: dict, timeframes=TIMEFRAMES, fields=FIELDS,
+                       base_timeframe="1H", dtype=np.float64, columns=None) -> pd.DataFrame:
+    """
+    `base` maps symbol -> DataFrame of base_timeframe candles aligned with `timestamps`
+    (one row per timestamp). Returns `timestamp` plus `<field>_<SYM>_<TF>` columns for
+    the requested fields and timeframes; higher timeframes hold the last closed bar.
+    Pass `columns` to materialize only those panel columns.
+    """
+    ts_ms = to_ms(timestamps)
+    symbols = list(base)
+    base_ms = TIMEFRAME_MS[base_timeframe]
+    timeframes = [tf for tf in timeframes if TIMEFRAME_MS[tf] >= base_ms]
+    names = panel_columns(symbols, timeframes, fields)
+    if columns is not None:
+        wanted = set(columns)
+        names = [c for c in names if c in wanted]
+    position = {name: i for i, name in enumerate(names)}
+    block = np.empty((len(ts_ms), len(names)), dtype=dtype)
+
+    for tf in timeframes:
+        tf_fields = [f for f in fields if any(f"{f}_{s}_{tf}" in position for s in symbols)]
+        if not tf_fields:
+            continue
+        if TIMEFRAME_MS[tf] > base_ms:
+            starts, ends, row_to_group = _closed_bar_index(ts_ms, base_ms, TIMEFRAME_MS[tf])
+            missing = row_to_group < 0
+            take = np.maximum(row_to_group, 0)
+
+        for field in tf_fields:
+            tf_symbols = [s for s in symbols if f"{field}_{s}_{tf}" in position]
+            # (rows, symbols) so each reduction covers every symbol at once.
+            values = np.column_stack([np.asarray(base[s][field], dtype=np.float64) for s in tf_symbols])
+            if TIMEFRAME_MS[tf] == base_ms:
+                out = values
+            else:
+                if field == "open":
+                    agg = values[starts]
+                elif field == "close":
+                    agg = values[ends]
+                else:
+                    agg = _REDUCERS[field].reduceat(values, starts, axis=0)
+                out = agg[take]
+                out[missing] = np.nan
+            block[:, [position[f"{field}_{s}_{tf}"] for s in tf_symbols]] = out
+
+    panel = pd.DataFrame(block, columns=names, copy=False)
+    panel.insert(0, "timestamp", pd.to_datetime(ts_ms, unit="ms"))
+    return panel
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized long/flat backtest for BUY/SELL/HOLD signals, scored on the same
+# metrics as the challenge: profitability, Sharpe ratio and max drawdown.
+#
+# Every function works along the last axis, so a 2D array of signal codes
+# (configs x candles) is backtested in one pass.
+
+HOLD, BUY, SELL = 0, 1, -1
+
+DEFAULT_FEE = 0.001        # 0.1% per side (Binance spot taker)
+DEFAULT_SLIPPAGE = 0.0005  # 0.05% per side
+
+PERIODS_PER_YEAR = {
+    "1H": 24 * 365,
+    "4H": 6 * 365,
+    "1D": 365,
+}
+
+def encode_signals(signals) -> np.ndarray:
+    """
+    Maps "BUY"/"SELL"/"HOLD" strings to int8 codes (anything else is HOLD).
+    """
+    values = np.asarray(signals, dtype=object)
+    codes = np.zeros(values.shape, dtype=np.int8)
+    codes[values == "BUY"] = BUY
+    codes[values == "SELL"] = SELL
+    return codes
+
+def positions(codes: np.ndarray) -> np.ndarray:
+    """
+    Long/flat state machine without a Python loop: BUY opens (or keeps) a long,
+    SELL goes flat, HOLD keeps the previous state. Starts flat.
+    """
+    codes = np.asarray(codes)
+    n = codes.shape[-1]
+    index_dtype = np.int32 if n < 2**31 else np.int64
+    last_event = np.where(codes != HOLD, np.arange(n, dtype=index_dtype), index_dtype(0))
+    np.maximum.accumulate(last_event, axis=-1, out=last_event)
+    state = (codes == BUY).astype(np.int8)
+    return np.take_along_axis(state, last_event, axis=-1)
+
+def asset_returns(close: np.ndarray) -> np.ndarray:
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.zeros_like(close)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+def strategy_returns(pos: np.ndarray, returns: np.ndarray, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE) -> np.ndarray:
+    """
+    Per-candle strategy returns. A position taken at candle i's close earns
+    candle i+1's return; each change of position pays fee + slippage.
+    """
+    out = np.zeros(pos.shape, dtype=np.float64)
+    np.multiply(pos[..., :-1], returns[..., 1:], out=out[..., 1:])
+    turnover = np.diff(pos, axis=-1, prepend=0) != 0
+    out[turnover] -= fee + slippage
+    return out
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year=PERIODS_PER_YEAR["1H"]) -> np.ndarray:
+    mean = returns.mean(axis=-1)
+    std = returns.std(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+    return sharpe
+
+def max_drawdown(equity: np.ndarray) -> np.ndarray:
+    """
+    Largest peak-to-trough loss of the equity curve, as a positive fraction.
+    """
+    peak = np.maximum.accumulate(equity, axis=-1)
+    np.divide(equity, peak, out=peak)
+    return 1 - peak.min(axis=-1)
+
+def backtest_codes(codes: np.ndarray, close: np.ndarray, timeframe="1H", fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE) -> dict:
+    """
+    Scores one (n,) or many (k, n) rows of signal codes against one close series.
+    Returns metric arrays; use run_backtest() for a single strategy's full report.
+    """
+    pos = positions(codes)
+    returns = strategy_returns(pos, asset_returns(close), fee, slippage)
+    sharpe = sharpe_ratio(returns, PERIODS_PER_YEAR.get(timeframe, PERIODS_PER_YEAR["1H"]))
+    equity = np.add(returns, 1, out=returns)
+    np.cumprod(equity, axis=-1, out=equity)
+    return {
+        "total_return": equity[..., -1] - 1,
+        "sharpe": sharpe,
+        "max_drawdown": max_drawdown(equity),
+        "n_trades": np.count_nonzero(pos[..., 1:] > pos[..., :-1], axis=-1) + (pos[..., 0] == 1),
+        "exposure": pos.mean(axis=-1),
+    }
+
+def trade_returns(pos: np.ndarray, close: np.ndarray, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE) -> np.ndarray:
+    """
+    Net return of each round trip, filled at the close of the entry and exit
+    candles. A trade still open at the end is closed at the last candle.
+    """
+    change = np.diff(pos, prepend=0, append=0)
+    entries = np.flatnonzero(change == 1)
+    exits = np.minimum(np.flatnonzero(change == -1), len(close) - 1)
+    cost = (1 - fee - slippage) ** 2
+    return close[exits] / close[entries] * cost - 1
+
+def _align_codes(signals: pd.DataFrame, candles_target: pd.DataFrame) -> np.ndarray:
+    codes = encode_signals(signals["signal"].to_numpy())
+    signal_ts = signals["timestamp"].to_numpy()
+    target_ts = candles_target["timestamp"].to_numpy()
+    if len(signal_ts) == len(target_ts) and np.array_equal(signal_ts, target_ts):
+        return codes
+    # Candles without a signal row are treated as HOLD.
+    idx = pd.Index(signal_ts).get_indexer(target_ts)
+    return np.where(idx >= 0, codes[idx], HOLD).astype(np.int8)
+
+def run_backtest(signals: pd.DataFrame, candles_target: pd.DataFrame, timeframe="1H",
+                 fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE) -> dict:
+    """
+    Backtests the `timestamp`/`signal` output of generate_signals() on candles_target.
+    Returns the equity curve, Profitability, Sharpe, Max Drawdown and trade stats.
+    """
+    close = candles_target["close"].to_numpy(dtype=np.float64)
+    codes = _align_codes(signals, candles_target)
+    pos = positions(codes)
+    returns = strategy_returns(pos, asset_returns(close), fee, slippage)
+    equity = np.cumprod(1 + returns)
+    trades = trade_returns(pos, close, fee, slippage)
+
+    return {
+        "equity": pd.Series(equity, index=candles_target["timestamp"].to_numpy(), name="equity"),
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "sharpe": float(sharpe_ratio(returns, PERIODS_PER_YEAR.get(timeframe, PERIODS_PER_YEAR["1H"]))) if len(returns) else 0.0,
+        "max_drawdown": float(max_drawdown(equity)) if len(equity) else 0.0,
+        "n_trades": int(len(trades)),
+        "win_rate": float((trades > 0).mean()) if len(trades) else 0.0,
+        "avg_trade_return": float(trades.mean()) if len(trades) else 0.0,
+        "exposure": float(pos.mean()) if len(pos) else 0.0,
+    }
+
+def format_report(result: dict) -> str:
+    return (
+        f"Profitability={result['total_return']:+.2%} | Sharpe={result['sharpe']:.2f} | "
+        f"MaxDD={result['max_drawdown']:.2%} | Trades={result['n_trades']} | "
+        f"WinRate={result['win_rate']:.0%}"
+    )
@@ -0,0 +1,166 @@
+import argparse
+import contextlib
+import glob
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing.connection import wait
+
+from backtest import run_backtest
+from shared_arrays import SharedArrays, attach_arrays
+from submission_check import (
+    ALLOWED_ANCHORS, EVAL_WINDOW_ROWS, MIN_AVG_VOLUME_USD, average_daily_volume, check_determinism_and_leaks,
+    generate_synthetic_candles, load_strategy, validate_anchors, validate_column_references, analyze_columns,
+    validate_imports, validate_metadata, validate_signals,
+)
+
+# Validates and scores many strategy files at once.
+#
+# The candles are built once and placed in shared memory; every strategy runs
+# in its own worker process that maps them read-only, under a wall-clock
+# timeout and an address-space cap, so a broken or hostile strategy can only
+# take down its own worker. A strategy only counts as passed after the same
+# checks as submission_check.run_check: metadata, columns, signal format, target
+# volume, determinism and future leaks (run in the worker, without a nested pool).
+
+TIMEOUT_S = 60.0
+MEMORY_LIMIT_MB = 4_096
+TARGET_FIELDS = ("open", "high", "low", "close", "volume")
+
+def share_candles(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame):
+    """
+    Copies the candles into shared memory. Returns (SharedArrays, anchor column names).
+    """
+    anchor_columns = [c for c in candles_anchor.columns if c != "timestamp"]
+    shared = SharedArrays({
+        "timestamp": candles_target["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+        "target": candles_target[list(TARGET_FIELDS)].to_numpy(dtype=np.float64),
+        "anchor": candles_anchor[anchor_columns].to_numpy(dtype=np.float64),
+    })
+    return shared, anchor_columns
+
+def attach_candles(specs, anchor_columns):
+    arrays, handles = attach_arrays(specs)
+    timestamps = pd.to_datetime(arrays["timestamp"], unit="ns")
+    candles_target = pd.DataFrame(arrays["target"], columns=list(TARGET_FIELDS), copy=False)
+    candles_target.insert(0, "timestamp", timestamps)
+    candles_anchor = pd.DataFrame(arrays["anchor"], columns=anchor_columns, copy=False)
+    candles_anchor.insert(0, "timestamp", timestamps)
+    return candles_target, candles_anchor, handles
+
+def _limit_memory(memory_mb):
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    limit = int(memory_mb * 1024 * 1024)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _check_one(path, specs, anchor_columns, memory_mb, conn):
+    result = {"path": path, "passed": False, "error": ""}
+    # Prints from the validation helpers would interleave across workers.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            _limit_memory(memory_mb)
+            # Shared candles are read-only; copy-on-write lets strategies "modify" them safely.
+            pd.set_option("mode.copy_on_write", True)
+            candles_target, candles_anchor, handles = attach_candles(specs, anchor_columns)
+
+            validate_imports(path)
+            strategy = load_strategy(path)
+            metadata = validate_metadata(strategy)
+            validate_anchors(metadata["anchors"])
+            validate_column_references(analyze_columns(path), metadata)
+
+            start = time.perf_counter()
+            signals = strategy.generate_signals(candles_target, candles_anchor)
+            result["runtime_s"] = time.perf_counter() - start
+            validate_signals(signals, candles_target)
+
+            symbol = metadata["target"]["symbol"]
+            result["avg_daily_usd_volume"], _ = average_daily_volume(symbol, candles_target)
+            if result["avg_daily_usd_volume"] < MIN_AVG_VOLUME_USD:
+                raise ValueError(f"❌ Avg daily USD volume of {symbol} is below $5,000,000")
+            check_determinism_and_leaks(path, candles_target, candles_anchor, workers=1)
+
+            metrics = run_backtest(signals, candles_target, timeframe=metadata["target"]["timeframe"])
+            metrics.pop("equity")
+            result.update(metrics)
+            result["passed"] = True
+        except BaseException as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+    conn.send(result)
+    conn.close()
+
+def batch_check(paths, candles_target=None, candles_anchor=None, workers=None,
+                timeout_s=TIMEOUT_S, memory_mb=MEMORY_LIMIT_MB) -> pd.DataFrame:
+    """
+    Validates and backtests every strategy file in `paths`, at most `workers` at a
+    time. Candles default to a synthetic evaluation-size window with all allowed
+    anchors. Returns one row per strategy, best Sharpe first.
+    """
+    if candles_target is None or candles_anchor is None:
+        metadata = {"anchors": [{"symbol": s} for s in sorted(ALLOWED_ANCHORS)]}
+        candles_target, candles_anchor = generate_synthetic_candles(metadata, EVAL_WINDOW_ROWS)
+    workers = workers or os.cpu_count()
+    pending = list(paths)
+    running = {}
+    results = []
+
+    shared, anchor_columns = share_candles(candles_target, candles_anchor)
+    with shared:
+        while pending or running:
+            while pending and len(running) < workers:
+                path = pending.pop(0)
+                parent, child = multiprocessing.Pipe(duplex=False)
+                proc = multiprocessing.Process(
+                    target=_check_one,
+                    args=(path, shared.specs, anchor_columns, memory_mb, child),
+                    daemon=True,
+                )
+                proc.start()
+                child.close()
+                running[proc.sentinel] = (proc, parent, path, time.monotonic())
+
+            ready = wait(list(running), timeout=0.1)
+            now = time.monotonic()
+            for sentinel in list(running):
+                proc, parent, path, started = running[sentinel]
+                if parent.poll():
+                    result = parent.recv()
+                elif sentinel in ready:
+                    result = {
+                        "path": path, "passed": False,
+                        "error": f"Worker exited with code {proc.exitcode} (memory limit?)",
+                    }
+                elif now - started > timeout_s:
+                    proc.kill()
+                    result = {"path": path, "passed": False, "error": f"Timed out after {timeout_s:.0f}s"}
+                else:
+                    continue
+                proc.join()
+                parent.close()
+                del running[sentinel]
+                results.append(result)
+
+    table = pd.DataFrame(results)
+    if "sharpe" in table.columns:
+        table = table.sort_values(["passed", "sharpe"], ascending=False, kind="stable")
+    return table.reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate and score many strategy files.")
+    parser.add_argument("pattern", help="directory or glob of strategy files, e.g. 'candidates/*.py'")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_S, help="seconds per strategy")
+    parser.add_argument("--memory", type=float, default=MEMORY_LIMIT_MB, help="address-space cap per strategy (MB)")
+    parser.add_argument("--out", default=None, help="write the results table to this CSV")
+    args = parser.parse_args()
+
+    pattern = os.path.join(args.pattern, "*.py") if os.path.isdir(args.pattern) else args.pattern
+    table = batch_check(sorted(glob.glob(pattern)), workers=args.workers, timeout_s=args.timeout, memory_mb=args.memory)
+    print(table.to_string(index=False))
+    if args.out:
+        table.to_csv(args.out, index=False)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# Signals of one config-driven strategy for many target coins at once.
+#
+# The strategy module supplies its rules and rule engine (everything below the
+# template's engine marker); anchor-only rules are evaluated once and broadcast
+# across targets, and only correlation rules are computed per target, as
+# (candles, targets) arrays.
+
+def generate_signals_batch(strategy, target_closes: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
+    """
+    strategy.generate_signals() for many targets at once. target_closes holds
+    `timestamp` plus one close column per target; the result holds `timestamp`
+    plus one signal column per target, identical to calling generate_signals()
+    on each target.
+    """
+    try:
+        targets = [c for c in target_closes.columns if c != 'timestamp']
+        buy_rules, sell_rules = strategy.BUY_RULES, strategy.SELL_RULES
+        df = strategy._anchor_frame(target_closes, candles_anchor)
+        buy_mask, sell_mask = strategy.compute_rule_masks(
+            df, [r for r in buy_rules if r.get('type') != 'correlation'],
+            [r for r in sell_rules if r.get('type') != 'correlation'])
+        buy = np.repeat(buy_mask[:, None], len(targets), axis=1)
+        sell = np.repeat(sell_mask[:, None], len(targets), axis=1)
+
+        target_rules = [(r, "buy") for r in buy_rules if r.get('type') == 'correlation'] \
+            + [(r, "sell") for r in sell_rules if r.get('type') == 'correlation']
+        if target_rules:
+            cache = {}
+            returns = target_closes[targets].pct_change().to_numpy(dtype=float)
+            for rule, side in target_rules:
+                col = f"close_{rule['symbol']}_{rule['timeframe']}"
+                if col not in df.columns:
+                    if side == "buy":
+                        buy[:] = False
+                    continue
+                x = strategy._lagged_change(df, col, 0, cache)
+                window = strategy._rule_window(rule)
+                values = strategy._shift(strategy._rolling_correlation(x, returns, window), rule['lag'])
+                hits = strategy.rule_hits(values, df[col].notna().to_numpy()[:, None], rule, side)
+                if side == "buy":
+                    buy &= hits
+                else:
+                    sell |= hits
+
+        labels = np.array(["HOLD", "BUY", "SELL"], dtype=object)
+        signals = labels[np.where(buy, 1, np.where(sell, 2, 0))]
+        out = pd.DataFrame(signals, columns=targets, index=target_closes.index)
+        out.insert(0, 'timestamp', target_closes['timestamp'])
+        return out
+
+    except Exception as e:
+        raise RuntimeError(f"Strategy failed. Please review your config.\nError: {e}")
@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from submission_check import (
+    EVAL_WINDOW_ROWS, analyze_columns, generate_synthetic_candles, load_strategy, projected_columns,
+    required_anchor_columns,
+)
+
+# Regression benchmark for a strategy's generate_signals().
+#
+# Each case runs the strategy on synthetic candles of a given size several times
+# under the profiler and keeps the median time of every stage the engine
+# reports (total, alignment, rule masks, each rule), plus the peak traced memory
+# of one extra run. --update stores the numbers as the baseline;
+# later runs are compared against it and any stage that got slower than
+# `tolerance` (and by more than `min_seconds`) is flagged.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_SIZES = (EVAL_WINDOW_ROWS, 10 * EVAL_WINDOW_ROWS)
+DEFAULT_REPEATS = 7
+TOLERANCE = 0.25         # flag stages more than 25% slower than the baseline
+MIN_SECONDS = 0.001      # ignore differences smaller than this (timer noise)
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine()}
+
+def measure(path="strategy.py", rows=EVAL_WINDOW_ROWS, repeats=DEFAULT_REPEATS, seed=0) -> dict:
+    """
+    Median seconds per profiled stage over `repeats` runs, and the peak traced MB.
+    """
+    strategy = load_strategy(path)
+    metadata = strategy.get_coin_metadata()
+    columns = projected_columns(strategy, metadata, required_anchor_columns(analyze_columns(path), metadata))
+    candles_target, candles_anchor = generate_synthetic_candles(metadata, rows, seed, columns=columns)
+    strategy.generate_signals(candles_target, candles_anchor)  # warm-up
+
+    timings = {}
+    for _ in range(repeats):
+        with instrumentation.profiled() as profiler:
+            instrumentation.instrument(strategy)
+            with instrumentation.stage("total"):
+                strategy.generate_signals(candles_target, candles_anchor)
+        for name, stats in profiler.summary()["stages"].items():
+            timings.setdefault(name, []).append(stats["total_s"])
+
+    with instrumentation.profiled(track_memory=True) as profiler:
+        instrumentation.instrument(strategy)
+        strategy.generate_signals(candles_target, candles_anchor)
+    instrumentation.instrument(strategy)
+
+    return {
+        "seconds": {name: float(np.median(values)) for name, values in timings.items()},
+        "peak_mb": profiler.peak_bytes / 1e6,
+    }
+
+def run_cases(path="strategy.py", sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS) -> dict:
+    return {
+        "environment": environment(),
+        "cases": {f"rows={rows}": measure(path, rows, repeats) for rows in sizes},
+    }
+
+def compare(current: dict, baseline: dict, tolerance=TOLERANCE, min_seconds=MIN_SECONDS) -> pd.DataFrame:
+    """
+    One row per (case, metric) present in both runs, with the ratio to the
+    baseline and whether it counts as a regression.
+    """
+    rows = []
+    for case, now in current["cases"].items():
+        before = baseline["cases"].get(case)
+        if before is None:
+            continue
+        metrics = [(f"{name} (s)", now["seconds"][name], before["seconds"][name], min_seconds)
+                   for name in now["seconds"] if name in before["seconds"]]
+        metrics.append(("peak (MB)", now["peak_mb"], before["peak_mb"], 1.0))
+        for metric, value, reference, floor in metrics:
+            ratio = value / reference if reference > 0 else np.inf
+            rows.append({
+                "case": case, "metric": metric, "baseline": reference, "current": value, "ratio": ratio,
+                "regressed": ratio > 1 + tolerance and value - reference > floor,
+            })
+    return pd.DataFrame(rows, columns=["case", "metric", "baseline", "current", "ratio", "regressed"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare generate_signals() stage timings against a stored baseline.")
+    parser.add_argument("path", nargs="?", default="strategy.py")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--update", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    current = run_cases(args.path, args.sizes, args.repeats)
+    if args.update or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != current["environment"]:
+        print(f"⚠️ Baseline was recorded on {baseline.get('environment')}; timings may not be comparable.")
+    table = compare(current, baseline, args.tolerance)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    regressed = table[table["regressed"]]
+    if len(regressed):
+        for row in regressed.itertuples():
+            print(f"❌ {row.case} {row.metric}: {row.baseline:.4f} → {row.current:.4f} ({row.ratio:.2f}x)")
+        sys.exit(1)
+    print("✅ No regressions against the baseline.")
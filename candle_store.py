@@ -0,0 +1,207 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import instrumentation
+
+# On-disk candle store keyed by (symbol, interval).
+#
+# Layout:  <root>/<SYMBOL>/<interval>/timestamp.npy   int64 open times (ms), sorted
+#          <root>/<SYMBOL>/<interval>/values.npy      float64, shape (len(FIELDS), n)
+#
+#          <root>/<SYMBOL>/<interval>/earliest.npy    int64 first open time the exchange has (optional)
+#          <root>/<SYMBOL>/<interval>/ingested.json   archive name -> size of every ingested archive (optional)
+#
+# Values are stored field-major so each field is one contiguous row, and both
+# files are opened with mmap so loading a cached series does not copy it. The
+# cost of that layout is that appending rewrites the whole series (O(n) per
+# call), so callers append each fetched or ingested batch in one call.
+
+STORE_DIR = "candle_store"
+FIELDS = ("open", "high", "low", "close", "volume", "quote_volume")
+
+class CandleStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def has(self, symbol, interval):
+        return os.path.exists(os.path.join(self._dir(symbol, interval), "timestamp.npy"))
+
+    def symbols(self, interval):
+        """
+        Returns every cached symbol that has data for `interval`.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(s for s in os.listdir(self.root) if self.has(s, interval))
+
+    def load(self, symbol, interval, mmap=True):
+        """
+        Returns (timestamps, values) for a cached series, memory-mapped read-only
+        by default. A missing series returns empty arrays.
+        """
+        if not self.has(symbol, interval):
+            return np.empty(0, dtype=np.int64), np.empty((len(FIELDS), 0), dtype=np.float64)
+        path = self._dir(symbol, interval)
+        mode = "r" if mmap else None
+        timestamps = np.load(os.path.join(path, "timestamp.npy"), mmap_mode=mode)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode=mode)
+        if values.shape[1] != len(timestamps):
+            # save() was interrupted between its two renames: values.npy is the new
+            # series and the matching timestamps are still in the temp file.
+            pending = os.path.join(path, "timestamp.tmp.npy")
+            if os.path.exists(pending):
+                timestamps = np.load(pending, mmap_mode=mode)
+            if values.shape[1] != len(timestamps):
+                raise ValueError(f"❌ Cached {symbol} ({interval}) is inconsistent; delete {path} and re-fetch it")
+        return timestamps, values
+
+    def save(self, symbol, interval, timestamps, values):
+        """
+        Replaces the cached series. Both files are written to temp files first and
+        then renamed, values first: a series only ever grows, so a crash between
+        the two renames leaves a values file longer than its timestamps, which
+        load() detects and completes from the temp timestamps.
+        """
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        arrays = (("values", np.ascontiguousarray(values, dtype=np.float64)),
+                  ("timestamp", np.ascontiguousarray(timestamps, dtype=np.int64)))
+        for name, arr in arrays:
+            np.save(os.path.join(path, f"{name}.tmp.npy"), arr)
+        for name, _ in arrays:
+            os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+
+    def append(self, symbol, interval, timestamps, values):
+        """
+        Merges new candles into the cached series. Candles with an open time that
+        is already cached are replaced by the new values. Rewrites the whole
+        series, so append a batch at a time rather than candle by candle.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(FIELDS), -1)
+        if len(timestamps) == 0:
+            return
+        old_ts, old_values = self.load(symbol, interval, mmap=False)
+        if len(old_ts) and timestamps[0] > old_ts[-1] and np.all(np.diff(timestamps) > 0):
+            # Common case: a pure tail append.
+            merged_ts = np.concatenate([old_ts, timestamps])
+            merged_values = np.concatenate([old_values, values], axis=1)
+        else:
+            all_ts = np.concatenate([timestamps, old_ts])
+            all_values = np.concatenate([values, old_values], axis=1)
+            # np.unique keeps the first occurrence, i.e. the new candle.
+            merged_ts, first = np.unique(all_ts, return_index=True)
+            merged_values = all_values[:, first]
+        self.save(symbol, interval, merged_ts, merged_values)
+
+    def coverage(self, symbol, interval):
+        """
+        Returns (first_open_ms, last_open_ms) of the cached series, or None.
+        """
+        timestamps, _ = self.load(symbol, interval)
+        if len(timestamps) == 0:
+            return None
+        return int(timestamps[0]), int(timestamps[-1])
+
+    def earliest(self, symbol, interval):
+        """
+        Returns the first open time the exchange has for the series, or None if unknown.
+        """
+        path = os.path.join(self._dir(symbol, interval), "earliest.npy")
+        return int(np.load(path)) if os.path.exists(path) else None
+
+    def mark_earliest(self, symbol, interval, earliest_ms):
+        """
+        Records that the exchange has no candles before `earliest_ms` (e.g. the
+        symbol was listed then), so missing_ranges() stops asking for them.
+        """
+        known = self.earliest(symbol, interval)
+        if known is not None and known >= earliest_ms:
+            return
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "earliest.tmp.npy"), np.int64(earliest_ms))
+        os.replace(os.path.join(path, "earliest.tmp.npy"), os.path.join(path, "earliest.npy"))
+
+    def ingested(self, symbol, interval):
+        """
+        Returns {archive name: size in bytes} of the archives ingested into the series.
+        """
+        path = os.path.join(self._dir(symbol, interval), "ingested.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def mark_ingested(self, symbol, interval, archives):
+        """
+        Records that the archives {name: size in bytes} are merged into the series.
+        """
+        merged = {**self.ingested(symbol, interval), **archives}
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "ingested.tmp.json"), "w") as f:
+            json.dump(merged, f, indent=1, sort_keys=True)
+        os.replace(os.path.join(path, "ingested.tmp.json"), os.path.join(path, "ingested.json"))
+
+    def missing_ranges(self, symbol, interval, start_ms, end_ms):
+        """
+        Returns the head and tail (start, end) ranges of [start_ms, end_ms] that
+        are not cached. The last cached candle is always re-fetched because it
+        may have been stored while still open. Nothing before the series'
+        earliest() open time is ever requested.
+        """
+        earliest = self.earliest(symbol, interval)
+        if earliest is not None:
+            start_ms = max(start_ms, earliest)
+        if start_ms > end_ms:
+            return []
+        cov = self.coverage(symbol, interval)
+        if cov is None:
+            return [(start_ms, end_ms)]
+        first, last = cov
+        ranges = []
+        if start_ms < first:
+            ranges.append((start_ms, min(first - 1, end_ms)))
+        if end_ms >= last:
+            ranges.append((max(last, start_ms), end_ms))
+        return ranges
+
+    def gaps(self, symbol, interval, step_ms, start_ms=None, end_ms=None):
+        """
+        Returns (after_ms, before_ms) pairs around every hole in the cached series
+        where consecutive open times are more than `step_ms` apart.
+        """
+        timestamps, _ = self._range(symbol, interval, start_ms, end_ms)
+        holes = np.flatnonzero(np.diff(timestamps) > step_ms)
+        return [(int(timestamps[i]), int(timestamps[i + 1])) for i in holes]
+
+    def _range(self, symbol, interval, start_ms, end_ms):
+        timestamps, values = self.load(symbol, interval)
+        lo = 0 if start_ms is None else np.searchsorted(timestamps, start_ms, side="left")
+        hi = len(timestamps) if end_ms is None else np.searchsorted(timestamps, end_ms, side="right")
+        return timestamps[lo:hi], values[:, lo:hi]
+
+    def read_range(self, symbol, interval, start_ms=None, end_ms=None):
+        """
+        Returns (timestamps, values) views limited to open times in [start_ms, end_ms].
+        Counts the bytes handed out as bytes_loaded; the mmaps behind them are
+        only read as far as the caller touches them.
+        """
+        timestamps, values = self._range(symbol, interval, start_ms, end_ms)
+        instrumentation.count("bytes_loaded", timestamps.nbytes + values.nbytes)
+        return timestamps, values
+
+    def to_frame(self, symbol, interval, start_ms=None, end_ms=None):
+        """
+        Returns the cached range as a DataFrame in the same layout as fetch_ohlcv.
+        """
+        timestamps, values = self.read_range(symbol, interval, start_ms, end_ms)
+        df = pd.DataFrame({"timestamp": pd.to_datetime(np.asarray(timestamps), unit="ms")})
+        for i, field in enumerate(FIELDS[:5]):
+            df[field] = np.asarray(values[i])
+        return df
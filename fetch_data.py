@@ -1,12 +1,150 @@
 import requests
+import numpy as np
 import pandas as pd
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from candle_store import FIELDS as STORE_FIELDS
+import instrumentation
 
 BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
 start_time_ms = 1735689600000
 end_time_ms = 1746748800000
 
-def fetch_ohlcv(symbol, interval, start_time_ms=start_time_ms, end_time_ms=end_time_ms):
+KLINES_LIMIT = 1000
+KLINES_WEIGHT = 2             # request weight of /api/v3/klines with limit <= 1000
+WEIGHT_PER_MINUTE = 6000      # Binance REQUEST_WEIGHT budget per IP per minute
+MAX_RETRIES = 5
+
+# Binance kline intervals of fixed length. Names are case-sensitive ("1m" is one
+# minute, "1M" one month); "1s" and the variable-length "1M" are not supported.
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+KLINE_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume",
+    "close_time", "quote_volume", "num_trades",
+    "taker_buy_base", "taker_buy_quote", "ignore"
+]
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to stay within Binance's request weight budget.
+    Each request acquires its weight; tokens refill continuously up to `capacity`.
+    """
+    def __init__(self, capacity=WEIGHT_PER_MINUTE, refill_per_sec=WEIGHT_PER_MINUTE / 60):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.refill_per_sec
+            time.sleep(wait)
+
+def make_session(pool_size=16):
+    """
+    Returns a requests.Session whose connection pool can serve `pool_size` threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def interval_ms(interval):
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"❌ Unsupported interval: {interval}. Allowed: {list(INTERVAL_MS)}")
+    return INTERVAL_MS[interval]
+
+def page_ranges(interval, start_time_ms, end_time_ms, limit=KLINES_LIMIT):
+    """
+    Splits [start_time_ms, end_time_ms] into independent (start, end) ranges
+    that hold at most `limit` candles each, so they can be fetched concurrently.
+    """
+    step = interval_ms(interval) * limit
+    return [(start, min(start + step - 1, end_time_ms)) for start in range(start_time_ms, end_time_ms + 1, step)]
+
+def _klines_to_frame(klines):
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+    df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
+    return df
+
+def _fetch_page(session, limiter, symbol, interval, start, end, api_url=BINANCE_API_URL):
+    params = {
+        "symbol": symbol.upper(),
+        "interval": interval,
+        "startTime": start,
+        "endTime": end,
+        "limit": KLINES_LIMIT
+    }
+    for _ in range(MAX_RETRIES):
+        limiter.acquire(KLINES_WEIGHT)
+        response = session.get(api_url, params=params, timeout=30)
+        if response.status_code in (418, 429):
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+            continue
+        response.raise_for_status()
+        instrumentation.count("bytes_fetched", len(response.content))
+        return response.json()
+    raise RuntimeError(f"❌ Rate limited while fetching {symbol} ({interval}) {start}-{end}")
+
+def _stitch(pages):
+    """
+    Concatenates page results in order, dropping candles repeated across pages.
+    """
+    klines = []
+    last_open = None
+    for page in pages:
+        for candle in page:
+            if last_open is None or candle[0] > last_open:
+                klines.append(candle)
+                last_open = candle[0]
+    return klines
+
+def fetch_ohlcv_parallel(symbol, interval, start_time_ms=start_time_ms, end_time_ms=end_time_ms,
+                         session=None, limiter=None, max_workers=8, api_url=BINANCE_API_URL):
+    """
+    Fetches the window as independent page ranges on a thread pool sharing one
+    pooled session, throttled by a token bucket instead of fixed sleeps.
+    """
+    if session is None:
+        with make_session(max_workers) as session:
+            return fetch_ohlcv_parallel(symbol, interval, start_time_ms, end_time_ms, session, limiter,
+                                        max_workers, api_url)
+    limiter = limiter or TokenBucket()
+    ranges = page_ranges(interval, start_time_ms, end_time_ms)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = list(pool.map(lambda r: _fetch_page(session, limiter, symbol, interval, r[0], r[1], api_url), ranges))
+    return _klines_to_frame(_stitch(pages))
+
+def _fetch_klines(symbol, interval, start_time_ms, end_time_ms, api_url=BINANCE_API_URL):
     all_candles = []
     limit = 1000
     current_time = start_time_ms
@@ -19,7 +157,8 @@ def fetch_ohlcv(symbol, interval, start_time_ms=start_time_ms, end_time_ms=end_t
             "endTime": end_time_ms,
             "limit": limit
         }
-        response = requests.get(BINANCE_API_URL, params=params)
+        response = requests.get(api_url, params=params)
+        instrumentation.count("bytes_fetched", len(response.content))
         data = response.json()
 
         if not data:
@@ -29,26 +168,106 @@ def fetch_ohlcv(symbol, interval, start_time_ms=start_time_ms, end_time_ms=end_t
         current_time = data[-1][0] + 1
         time.sleep(0.2)  # avoid rate limits
 
-    df = pd.DataFrame(all_candles, columns=[
-        "timestamp", "open", "high", "low", "close", "volume",
-        "close_time", "quote_volume", "num_trades",
-        "taker_buy_base", "taker_buy_quote", "ignore"
-    ])
+    return all_candles
 
-    df = df[["timestamp", "open", "high", "low", "close", "volume"]]
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
+def _klines_to_arrays(klines):
+    """
+    Converts raw klines to (timestamps, values) in the CandleStore layout.
+    """
+    if not klines:
+        return np.empty(0, dtype=np.int64), np.empty((len(STORE_FIELDS), 0), dtype=np.float64)
+    timestamps = np.array([k[0] for k in klines], dtype=np.int64)
+    values = np.array([[k[1], k[2], k[3], k[4], k[5], k[7]] for k in klines], dtype=np.float64).T
+    return timestamps, values
 
-    return df
+def first_open_ms(symbol, interval, api_url=BINANCE_API_URL):
+    """
+    Open time of the first kline the exchange has for the series, None if it has none.
+    """
+    params = {"symbol": symbol.upper(), "interval": interval, "startTime": 0, "limit": 1}
+    response = requests.get(api_url, params=params, timeout=30)
+    response.raise_for_status()
+    instrumentation.count("bytes_fetched", len(response.content))
+    klines = response.json()
+    return int(klines[0][0]) if klines else None
+
+def _store_klines(store, symbol, interval, start, end, klines, api_url=BINANCE_API_URL):
+    """
+    Appends the klines fetched for [start, end] to the store. When that range is
+    the head of the series and it starts more than a candle before the first
+    kline returned, the exchange is asked for the series' first kline; only if
+    that is after `start` (the symbol was listed later) is it recorded, so the
+    range is not requested again. A gap at `start` alone proves nothing.
+    """
+    timestamps, values = _klines_to_arrays(klines)
+    cov = store.coverage(symbol, interval)
+    if cov is None or start < cov[0]:
+        if len(timestamps) == 0 or timestamps[0] >= start + interval_ms(interval):
+            listed = first_open_ms(symbol, interval, api_url)
+            if listed is not None and listed > start:
+                store.mark_earliest(symbol, interval, listed)
+    store.append(symbol, interval, timestamps, values)
+
+def _store_frame(store, symbol, interval, start_time_ms, end_time_ms):
+    gaps = store.gaps(symbol, interval, interval_ms(interval), start_time_ms, end_time_ms)
+    if gaps:
+        first_gap = pd.to_datetime(gaps[0][0], unit="ms")
+        print(f"⚠️ {symbol} ({interval}) has {len(gaps)} gap(s) in cached data, first after {first_gap}")
+    return store.to_frame(symbol, interval, start_time_ms, end_time_ms)
 
-def fetch_all(symbols_with_timeframes, start_time, end_time):
+def fetch_ohlcv(symbol, interval, start_time_ms=start_time_ms, end_time_ms=end_time_ms, api_url=BINANCE_API_URL, store=None):
+    """
+    Downloads candles for [start_time_ms, end_time_ms]. With a CandleStore only the
+    uncached head/tail ranges are downloaded and appended before reading back.
+    """
+    if store is None:
+        with instrumentation.stage("fetch", symbol=symbol, interval=interval):
+            klines = _fetch_klines(symbol, interval, start_time_ms, end_time_ms, api_url)
+        with instrumentation.stage("parse klines"):
+            return _klines_to_frame(klines)
+
+    for start, end in store.missing_ranges(symbol, interval, start_time_ms, end_time_ms):
+        with instrumentation.stage("fetch", symbol=symbol, interval=interval):
+            klines = _fetch_klines(symbol, interval, start, end, api_url)
+        with instrumentation.stage("store append"):
+            _store_klines(store, symbol, interval, start, end, klines, api_url)
+    with instrumentation.stage("store read"):
+        return _store_frame(store, symbol, interval, start_time_ms, end_time_ms)
+
+def fetch_all(symbols_with_timeframes, start_time, end_time, parallel=False, max_workers=8, api_url=BINANCE_API_URL, store=None):
     start_ms = int(pd.Timestamp(start_time).timestamp() * 1000)
     end_ms = int(pd.Timestamp(end_time).timestamp() * 1000)
     all_data = {}
 
+    if parallel:
+        # Every page of every symbol goes into one pool so workers never idle
+        # behind a single long download; pages are stitched back per symbol.
+        limiter = TokenBucket()
+        with make_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for name, (symbol, tf) in symbols_with_timeframes.items():
+                print(f"Fetching {symbol} ({tf})...")
+                ranges = [(start_ms, end_ms)] if store is None else store.missing_ranges(symbol, tf, start_ms, end_ms)
+                futures[name] = [
+                    (range_start, range_end, [
+                        pool.submit(_fetch_page, session, limiter, symbol, tf, start, end, api_url)
+                        for start, end in page_ranges(tf, range_start, range_end)
+                    ])
+                    for range_start, range_end in ranges
+                ]
+            for name, ranges in futures.items():
+                if store is None:
+                    all_data[name] = _klines_to_frame(_stitch(f.result() for _, _, pages in ranges for f in pages))
+                    continue
+                symbol, tf = symbols_with_timeframes[name]
+                for range_start, range_end, pages in ranges:
+                    _store_klines(store, symbol, tf, range_start, range_end, _stitch(f.result() for f in pages), api_url)
+                all_data[name] = _store_frame(store, symbol, tf, start_ms, end_ms)
+        return all_data
+
     for name, (symbol, tf) in symbols_with_timeframes.items():
         print(f"Fetching {symbol} ({tf})...")
-        df = fetch_ohlcv(symbol, tf, start_ms, end_ms)
+        df = fetch_ohlcv(symbol, tf, start_ms, end_ms, api_url=api_url, store=store)
         all_data[name] = df
 
     return all_data
\ No newline at end of file
@@ -0,0 +1,155 @@
+import argparse
+import os
+import re
+import zipfile
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from candle_store import CandleStore, FIELDS, STORE_DIR
+from fetch_data import INTERVAL_MS, interval_ms
+
+# Bulk ingestion of Binance kline archives (data.binance.vision) into the candle store.
+#
+# Archives are named <SYMBOL>-<interval>-<YYYY>-<MM>.zip (monthly) or
+# <SYMBOL>-<interval>-<YYYY>-<MM>-<DD>.zip (daily) and hold one headerless CSV in
+# the /api/v3/klines column order. The CSV is decompressed as a stream and parsed
+# in chunks straight into int64/float64 arrays. Archives already ingested (same
+# name and size, recorded by CandleStore.mark_ingested) or whose period is fully
+# cached are skipped without being opened; everything else is merged with
+# CandleStore.append, which dedupes by open time. Each (symbol, interval) runs in
+# its own worker process since they write to separate store directories.
+# Intervals the store does not support ("1s", "1mo") are skipped with a warning.
+
+ARCHIVE_PATTERN = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\w+)-(?P<year>\d{4})-(?P<month>\d{2})(?:-(?P<day>\d{2}))?\.zip$")
+CSV_COLUMNS = (0, 1, 2, 3, 4, 5, 7)      # open time, OHLCV, quote asset volume
+CHUNK_ROWS = 200_000
+# Open times above this are microseconds (Binance spot archives from 2025 on).
+MICROSECOND_THRESHOLD = 10 ** 14
+
+def parse_archive_name(path):
+    """
+    Returns (symbol, interval, period_start_ms, period_end_ms) for an archive file
+    name, with period_end_ms exclusive, or None when the name does not match.
+    """
+    match = ARCHIVE_PATTERN.match(os.path.basename(path))
+    if match is None:
+        return None
+    start = pd.Timestamp(int(match["year"]), int(match["month"]), int(match["day"] or 1))
+    end = start + (pd.DateOffset(days=1) if match["day"] else pd.DateOffset(months=1))
+    return match["symbol"], match["interval"], int(start.value // 1_000_000), int(end.value // 1_000_000)
+
+def find_archives(directory) -> dict:
+    """
+    Groups every archive below `directory` by (symbol, interval), each list sorted
+    by period. Archives of unsupported intervals are skipped with a warning.
+    """
+    groups = defaultdict(list)
+    skipped = defaultdict(int)
+    for dirpath, _, files in os.walk(directory):
+        for name in files:
+            parsed = parse_archive_name(name)
+            if parsed is None:
+                continue
+            symbol, interval, start, end = parsed
+            if interval not in INTERVAL_MS:
+                skipped[(symbol, interval)] += 1
+                continue
+            groups[(symbol, interval)].append((start, end, os.path.join(dirpath, name)))
+    for (symbol, interval), n in sorted(skipped.items()):
+        print(f"⚠️ Skipping {n} {symbol} archive(s): unsupported interval {interval}")
+    return {key: sorted(archives) for key, archives in groups.items()}
+
+def _has_header(zf, member):
+    with zf.open(member) as f:
+        return not f.readline()[:1].isdigit()
+
+def read_archive(path, chunk_rows=CHUNK_ROWS):
+    """
+    Parses one archive into (timestamps, values) in the CandleStore layout:
+    int64 open times in ms and float64 values of shape (len(FIELDS), n).
+    """
+    timestamps, values = [], []
+    with zipfile.ZipFile(path) as zf:
+        for member in zf.namelist():
+            if not member.endswith(".csv"):
+                continue
+            skip = 1 if _has_header(zf, member) else 0
+            with zf.open(member) as f:
+                reader = pd.read_csv(f, header=None, skiprows=skip, usecols=CSV_COLUMNS,
+                                     dtype=np.float64, chunksize=chunk_rows, engine="c")
+                for chunk in reader:
+                    block = chunk.to_numpy()
+                    ts = block[:, 0].astype(np.int64)
+                    timestamps.append(np.where(ts >= MICROSECOND_THRESHOLD, ts // 1000, ts))
+                    values.append(block[:, 1:].T)
+    if not timestamps:
+        return np.empty(0, dtype=np.int64), np.empty((len(FIELDS), 0), dtype=np.float64)
+    return np.concatenate(timestamps), np.concatenate(values, axis=1)
+
+def _is_cached(cached_ts, step_ms, start_ms, end_ms):
+    """
+    True when the cached open times already hold every candle of [start_ms, end_ms).
+    """
+    lo, hi = np.searchsorted(cached_ts, [start_ms, end_ms], side="left")
+    return hi - lo == (end_ms - start_ms) // step_ms
+
+def ingest_series(root, symbol, interval, archives, force=False):
+    """
+    Ingests the archives of one (symbol, interval) into the store at `root`.
+    Returns (symbol, interval, archives read, candles read).
+    """
+    store = CandleStore(root)
+    step = interval_ms(interval)
+    ingested = store.ingested(symbol, interval)
+    cached_ts, _ = store.load(symbol, interval)
+    todo = {}
+    for start, end, path in archives:
+        name, size = os.path.basename(path), os.path.getsize(path)
+        if force or (ingested.get(name) != size and not _is_cached(cached_ts, step, start, end)):
+            todo[name] = (path, size)
+    del cached_ts
+    if not todo:
+        return symbol, interval, 0, 0
+
+    parts = [read_archive(path) for path, _ in todo.values()]
+    timestamps = np.concatenate([p[0] for p in parts])
+    values = np.concatenate([p[1] for p in parts], axis=1)
+    # Archives can overlap (daily files next to the monthly one); keep the last copy.
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, values = timestamps[order], values[:, order]
+    last = np.r_[timestamps[1:] != timestamps[:-1], True]
+    store.append(symbol, interval, timestamps[last], values[:, last])
+    store.mark_ingested(symbol, interval, {name: size for name, (_, size) in todo.items()})
+    return symbol, interval, len(todo), int(last.sum())
+
+def _ingest_task(args):
+    return ingest_series(*args)
+
+def ingest_directory(directory, root=STORE_DIR, workers=None, force=False) -> pd.DataFrame:
+    """
+    Ingests every archive below `directory` into the candle store, one
+    (symbol, interval) per task on a process pool. Returns one summary row per series.
+    """
+    tasks = [(root, symbol, interval, archives, force)
+             for (symbol, interval), archives in sorted(find_archives(directory).items())]
+    workers = workers if workers is not None else os.cpu_count()
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_ingest_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_ingest_task, tasks))
+    return pd.DataFrame(results, columns=["symbol", "interval", "archives", "candles"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest Binance kline zip archives into the candle store.")
+    parser.add_argument("directory", help="directory containing <SYMBOL>-<interval>-<YYYY>-<MM>.zip files")
+    parser.add_argument("--root", default=STORE_DIR, help="candle store directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-read archives even if already cached")
+    args = parser.parse_args()
+
+    summary = ingest_directory(args.directory, args.root, args.workers, args.force)
+    print(summary.to_string(index=False))
+    print(f"✅ Ingested {summary['candles'].sum()} candles from {summary['archives'].sum()} archive(s)")
@@ -0,0 +1,190 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Opt-in profiling of the strategy pipeline.
+#
+# Code marks its hot paths with stage("name") blocks and count() calls
+# (bytes_fetched from Binance, bytes_loaded from the candle store). Nothing is
+# recorded until enable() installs a Profiler; until then stage() returns a
+# shared no-op context and count() returns at once, so the hooks cost one
+# global lookup when profiling is off. Strategy files can only import
+# pandas/numpy, so instrument(module) times a config-driven strategy from the
+# outside by wrapping its engine functions in stages.
+#
+#     with profiled(track_memory=True) as profiler:
+#         run_check("strategy.py")
+#     profiler.to_chrome_trace("check.trace.json")   # open in chrome://tracing or Perfetto
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_STAGE = _NullStage()
+
+class _Stage:
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        args = dict(self.args)
+        if self.profiler.track_memory:
+            args["alloc_bytes"] = tracemalloc.get_traced_memory()[0] - self.memory
+        self.profiler._record(self.name, self.start, end - self.start, args)
+        return False
+
+class Profiler:
+    """
+    Collects stage timings (with nesting, per thread), counters and, with
+    track_memory=True, the net bytes allocated in each stage via tracemalloc.
+    """
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.events = []
+        self.counters = defaultdict(int)
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        self.peak_bytes = None
+        self.owns_tracemalloc = False
+
+    def stage(self, name, **args):
+        return _Stage(self, name, args)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def _record(self, name, start, duration, args):
+        with self.lock:
+            self.events.append((name, start - self.origin, duration, threading.get_ident(), args))
+
+    def summary(self) -> dict:
+        """
+        Per-stage call counts and timings (seconds), counters and peak memory.
+        """
+        stages = {}
+        for name, _, duration, _, args in self.events:
+            s = stages.setdefault(name, {"calls": 0, "total_s": 0.0, "max_s": 0.0})
+            s["calls"] += 1
+            s["total_s"] += duration / 1e9
+            s["max_s"] = max(s["max_s"], duration / 1e9)
+            if "alloc_bytes" in args:
+                s["alloc_bytes"] = s.get("alloc_bytes", 0) + args["alloc_bytes"]
+        for s in stages.values():
+            s["mean_s"] = s["total_s"] / s["calls"]
+        return {"stages": stages, "counters": dict(self.counters), "peak_bytes": self.peak_bytes}
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_chrome_trace(self, path):
+        """
+        Writes the Chrome trace-event format: one complete ("X") event per stage
+        and one counter ("C") event per counter.
+        """
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000,
+                   "pid": pid, "tid": tid, "args": args}
+                  for name, start, duration, tid, args in self.events]
+        end = max((e["ts"] + e["dur"] for e in events), default=0)
+        events += [{"name": name, "ph": "C", "ts": end, "pid": pid, "tid": 0, "args": {name: value}}
+                   for name, value in self.counters.items()]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+_active = None
+
+def enable(track_memory=False) -> Profiler:
+    global _active
+    _active = Profiler(track_memory)
+    # Leave tracemalloc running afterwards if someone else started it.
+    _active.owns_tracemalloc = track_memory and not tracemalloc.is_tracing()
+    if _active.owns_tracemalloc:
+        tracemalloc.start()
+    return _active
+
+def disable():
+    """
+    Stops recording and returns the profiler that was active (or None).
+    """
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None and profiler.track_memory and tracemalloc.is_tracing():
+        profiler.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if profiler.owns_tracemalloc:
+            tracemalloc.stop()
+    return profiler
+
+def active():
+    return _active
+
+class profiled:
+    """
+    Context manager: profiling is enabled inside the block. `as` gives the Profiler.
+    """
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+
+    def __enter__(self) -> Profiler:
+        return enable(self.track_memory)
+
+    def __exit__(self, *exc):
+        disable()
+        return False
+
+def stage(name, **args):
+    return _active.stage(name, **args) if _active is not None else NULL_STAGE
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+def _rule_stage(df, rule, cache):
+    return f"rule {rule.get('type', 'pct_change')} {rule['symbol']}_{rule['timeframe']} lag={rule['lag']}"
+
+# Engine functions of strategy-template.py that instrument() times, with the
+# stage name of a call.
+ENGINE_STAGES = {
+    "_anchor_frame": lambda *args: "align anchors",
+    "compute_rule_masks": lambda *args: "rule masks",
+    "rule_series": _rule_stage,
+}
+
+def _timed(fn, name):
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        with stage(name(*args, **kwargs)):
+            return fn(*args, **kwargs)
+    timed.untimed = fn
+    return timed
+
+def instrument(module):
+    """
+    Wraps a strategy module's engine functions in stages while a profiler is
+    active, and restores the originals when none is. Strategies that do not
+    use the template engine are left alone.
+    """
+    for attr, name in ENGINE_STAGES.items():
+        fn = getattr(module, attr, None)
+        if fn is None:
+            continue
+        fn = getattr(fn, "untimed", fn)
+        setattr(module, attr, _timed(fn, name) if _active is not None else fn)
+    return module
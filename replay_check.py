@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from align import TimestampAligner
+from streaming import StreamingSignals
+from strategy_codegen import TEMPLATE_PATH
+from submission_check import load_strategy
+
+# Replays candles one at a time through StreamingSignals for a strategy and
+# checks every streamed signal against the batch generate_signals() output.
+# Anchor rows are first aligned to the target timestamps with TimestampAligner,
+# and check_alignment() verifies that it picks the same anchor candle for every
+# target candle as the batch engine's own anchor_rows().
+
+def aligned_anchor(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame, timeframe="1H") -> pd.DataFrame:
+    """
+    candles_anchor with one row per target candle: the last anchor row at or
+    before it (NaN before the first), stamped with the target's timestamp.
+    """
+    return TimestampAligner(candles_target["timestamp"], timeframe).align_frame(candles_anchor)
+
+def check_alignment(strategy, candles_target: pd.DataFrame, candles_anchor: pd.DataFrame):
+    """
+    Returns None when TimestampAligner and the strategy engine's anchor_rows() map
+    every target candle to the same anchor row, otherwise the timestamp of the
+    first target candle where they differ.
+    """
+    n = len(candles_target)
+    engine = strategy.anchor_rows(candles_target, candles_anchor)
+    engine = np.arange(n) if engine is None else engine
+    aligner = TimestampAligner(candles_target["timestamp"]).index_map(candles_anchor["timestamp"])
+    aligner = np.arange(n) if aligner is None else aligner
+    differ = np.flatnonzero(engine != aligner)
+    return candles_target["timestamp"].iloc[differ[0]] if len(differ) else None
+
+def replay(strategy, candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> list:
+    engine = StreamingSignals.for_strategy(strategy)
+    timeframe = strategy.get_coin_metadata()["target"]["timeframe"]
+    targets = candles_target.to_dict("records")
+    anchors = aligned_anchor(candles_target, candles_anchor, timeframe).to_dict("records")
+    return [engine.update(t, a) for t, a in zip(targets, anchors)]
+
+def check_streaming_replay(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame, path=TEMPLATE_PATH):
+    """
+    Returns None when streaming and batch signals are identical, otherwise the
+    (timestamp, batch signal, streamed signal) of the first mismatch.
+    """
+    strategy = load_strategy(path)
+    ts = check_alignment(strategy, candles_target, candles_anchor)
+    if ts is not None:
+        print(f"❌ TimestampAligner and the strategy engine pick different anchor rows at {ts}")
+        return ts, None, None
+    batch = strategy.generate_signals(candles_target, candles_anchor)["signal"].to_numpy()
+    streamed = np.array(replay(strategy, candles_target, candles_anchor), dtype=object)
+    mismatch = np.flatnonzero(batch != streamed)
+    if len(mismatch) == 0:
+        print(f"✅ Streaming replay matches batch signals on {len(batch)} candles.")
+        return None
+    i = mismatch[0]
+    ts = candles_target["timestamp"].iloc[i]
+    print(f"❌ Streaming replay diverges at {ts}: batch={batch[i]} streamed={streamed[i]}")
+    return ts, batch[i], streamed[i]
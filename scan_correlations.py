@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from candle_store import CandleStore, FIELDS, STORE_DIR
+from fetch_data import start_time_ms, end_time_ms
+
+# Lead/lag scanner: which coins follow BTC, ETH or SOL, and by how many candles?
+#
+# Cross-correlation of returns between one anchor and a whole matrix of targets
+# is computed for every lag 0..max_lag in a single batched FFT pass instead of
+# one corr() per lag. Each lag is a Pearson correlation over exactly the pairs
+# that overlap at that lag: the pair counts, sums and sums of squares come from
+# the same FFT pass, so means and variances are never taken from the full
+# series. Stability is the best lag's correlation over overlapping rolling
+# windows (`window` candles every `step` candles).
+
+ANCHORS = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+TIMEFRAMES = {"1H": "1h", "4H": "4h", "1D": "1d"}
+DEFAULT_MAX_LAG = 48
+DEFAULT_WINDOW_FRACTION = 4   # rolling window = candles // 4 unless given
+DEFAULT_STEP_FRACTION = 4     # rolling step = window // 4 unless given
+MIN_PAIRS = 3
+TARGETS_PER_TASK = 64
+
+def _standardize(returns: np.ndarray):
+    """
+    Scales each row to unit variance around its mean over valid entries, only to
+    keep the FFT sums well conditioned; returns (zeros-for-NaN values, validity mask).
+    """
+    valid = ~np.isnan(returns)
+    count = np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+    filled = np.where(valid, returns, 0.0)
+    mean = filled.sum(axis=-1, keepdims=True) / count
+    centered = np.where(valid, returns - mean, 0.0)
+    std = np.sqrt((centered ** 2).sum(axis=-1, keepdims=True) / count)
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0), valid.astype(np.float64)
+
+def _pearson(n, sx, sy, sxx, syy, sxy) -> np.ndarray:
+    """
+    Correlation from pair count and sums; NaN with fewer than MIN_PAIRS pairs or no spread.
+    """
+    n_safe = np.maximum(n, 1)
+    cov = sxy - sx * sy / n_safe
+    var = np.maximum(sxx - sx * sx / n_safe, 0.0) * np.maximum(syy - sy * sy / n_safe, 0.0)
+    ok = (n >= MIN_PAIRS) & (var > 0)
+    return np.divide(cov, np.sqrt(var), out=np.full(np.broadcast_shapes(cov.shape, var.shape), np.nan), where=ok)
+
+def lagged_correlations(anchor_returns: np.ndarray, target_returns: np.ndarray, max_lag=DEFAULT_MAX_LAG) -> np.ndarray:
+    """
+    corr[..., k] is the correlation of anchor return at t with target return at t + k
+    (the target following the anchor by k candles), for k = 0..max_lag, over the
+    pairs where both are valid. Works on any leading batch shape; the time axis is
+    last.
+    """
+    x, mx = _standardize(anchor_returns)
+    y, my = _standardize(target_returns)
+    n = x.shape[-1]
+    n_fft = 1 << int(np.ceil(np.log2(max(2 * n, 2))))
+
+    def spectrum(a):
+        return np.fft.rfft(a, n_fft)
+
+    def lagged_sum(a_spec, b_spec):
+        # sum over t of a[t] * b[t + k], for k = 0..max_lag
+        return np.fft.irfft(np.conj(a_spec) * b_spec, n_fft)[..., :max_lag + 1]
+
+    X, XX, MX = spectrum(x), spectrum(x * x), spectrum(mx)
+    Y, YY, MY = spectrum(y), spectrum(y * y), spectrum(my)
+    pairs = np.rint(lagged_sum(MX, MY))
+    return _pearson(pairs, lagged_sum(X, MY), lagged_sum(MX, Y), lagged_sum(XX, MY), lagged_sum(MX, YY),
+                    lagged_sum(X, Y))
+
+def rolling_correlations(anchor_returns: np.ndarray, target_returns: np.ndarray, lags: np.ndarray,
+                         window: int, step: int) -> np.ndarray:
+    """
+    (targets, windows) correlations of the anchor at t with each target at
+    t + lags[i], over anchor times [s, s + window) for s = 0, step, 2 * step, ...
+    """
+    x, mx = _standardize(anchor_returns)
+    y, my = _standardize(target_returns)
+    n = x.shape[-1]
+    # Target rows shifted back by their lag, so column t pairs with the anchor at t.
+    cols = np.arange(n)[None, :] + np.asarray(lags)[:, None]
+    inside = cols < n
+    cols = np.minimum(cols, n - 1)
+    rows = np.arange(len(y))[:, None]
+    y, my = np.where(inside, y[rows, cols], 0.0), np.where(inside, my[rows, cols], 0.0)
+    both = mx * my
+    x, y = x * both, y * both
+
+    starts = np.arange(0, n - window + 1, step)
+
+    def window_sums(values):
+        cum = np.zeros(values.shape[:-1] + (n + 1,))
+        np.cumsum(values, axis=-1, out=cum[..., 1:])
+        return cum[..., starts + window] - cum[..., starts]
+
+    return _pearson(np.rint(window_sums(both)), window_sums(x), window_sums(y), window_sums(x * x),
+                    window_sums(y * y), window_sums(x * y))
+
+def lead_lag_table(anchor_returns: np.ndarray, target_returns: np.ndarray, targets: list,
+                   max_lag=DEFAULT_MAX_LAG, min_lag=1, window=None, step=None) -> pd.DataFrame:
+    """
+    Best lag (>= min_lag, by absolute correlation) per target, with the full-period
+    correlation and its stability across overlapping rolling windows of `window`
+    candles every `step` candles (defaults: a quarter of the data, every quarter window).
+    """
+    corr = lagged_correlations(anchor_returns, target_returns, max_lag)
+    search = np.nan_to_num(np.abs(corr[:, min_lag:]), nan=-1.0)
+    best = search.argmax(axis=-1) + min_lag
+    rows = np.arange(len(targets))
+    best_corr = corr[rows, best]
+
+    n = anchor_returns.shape[-1]
+    window = window or max(n // DEFAULT_WINDOW_FRACTION, max_lag + MIN_PAIRS)
+    step = step or max(window // DEFAULT_STEP_FRACTION, 1)
+    at_best = rolling_correlations(anchor_returns, target_returns, best, min(window, n), step)
+    with np.errstate(invalid="ignore"):
+        same_sign = (np.sign(at_best) == np.sign(best_corr)[:, None]).mean(axis=-1)
+
+    return pd.DataFrame({
+        "target": targets,
+        "best_lag": best,
+        "correlation": best_corr,
+        "corr_lag0": corr[:, 0],
+        "window_mean": np.nanmean(at_best, axis=-1),
+        "window_std": np.nanstd(at_best, axis=-1),
+        "sign_stability": same_sign,
+        "n_windows": at_best.shape[-1],
+        "n_obs": (~np.isnan(target_returns)).sum(axis=-1),
+    })
+
+def load_returns(store: CandleStore, symbols: list, interval: str, timestamps: np.ndarray,
+                 start_ms=start_time_ms, end_ms=end_time_ms) -> np.ndarray:
+    """
+    Close-to-close returns of `symbols` on the given timestamp grid, shape (symbols, candles).
+    Candles missing for a symbol are NaN.
+    """
+    close_row = FIELDS.index("close")
+    closes = np.full((len(symbols), len(timestamps)), np.nan)
+    for i, symbol in enumerate(symbols):
+        ts, values = store.read_range(symbol, interval, start_ms, end_ms)
+        pos = np.searchsorted(timestamps, ts)
+        hit = (pos < len(timestamps)) & (timestamps[np.minimum(pos, len(timestamps) - 1)] == ts)
+        closes[i, pos[hit]] = values[close_row][hit]
+    returns = np.full_like(closes, np.nan)
+    returns[:, 1:] = closes[:, 1:] / closes[:, :-1] - 1
+    return returns
+
+def _scan_task(args):
+    root, anchor, targets, timeframe, start_ms, end_ms, max_lag, min_lag, window, step = args
+    store = CandleStore(root)
+    interval = TIMEFRAMES[timeframe]
+    timestamps, _ = store.read_range(anchor, interval, start_ms, end_ms)
+    if len(timestamps) <= max_lag + 1:
+        return pd.DataFrame()
+    timestamps = np.asarray(timestamps)
+    anchor_returns = load_returns(store, [anchor], interval, timestamps, start_ms, end_ms)[0]
+    target_returns = load_returns(store, targets, interval, timestamps, start_ms, end_ms)
+    table = lead_lag_table(anchor_returns, target_returns, targets, max_lag, min_lag, window, step)
+    table.insert(1, "anchor", anchor)
+    table.insert(2, "timeframe", timeframe)
+    return table
+
+def scan(targets=None, anchors=ANCHORS, timeframes=tuple(TIMEFRAMES), root=STORE_DIR,
+         start_ms=start_time_ms, end_ms=end_time_ms, max_lag=DEFAULT_MAX_LAG, min_lag=1,
+         window=None, step=None, workers=None) -> pd.DataFrame:
+    """
+    Scans cached candles for targets that follow each anchor. Targets default to
+    every cached symbol at the timeframe. Work is split into (anchor, timeframe,
+    target chunk) tasks run on a process pool; each worker memory-maps the store.
+    Returns one row per (target, anchor, timeframe), ranked by |correlation|.
+    """
+    store = CandleStore(root)
+    tasks = []
+    for timeframe in timeframes:
+        universe = targets if targets is not None else store.symbols(TIMEFRAMES[timeframe])
+        for anchor in anchors:
+            chunk = [s for s in universe if s != anchor]
+            for i in range(0, len(chunk), TARGETS_PER_TASK):
+                tasks.append((root, anchor, chunk[i:i + TARGETS_PER_TASK], timeframe,
+                              start_ms, end_ms, max_lag, min_lag, window, step))
+
+    workers = workers if workers is not None else os.cpu_count()
+    if workers <= 1 or len(tasks) <= 1:
+        tables = [_scan_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            tables = list(pool.map(_scan_task, tasks))
+
+    tables = [t for t in tables if len(t)]
+    if not tables:
+        return pd.DataFrame(columns=["target", "anchor", "timeframe", "best_lag", "correlation"])
+    result = pd.concat(tables, ignore_index=True)
+    order = np.argsort(-result["correlation"].abs().to_numpy(), kind="stable")
+    return result.iloc[order].reset_index(drop=True)
+
+if __name__ == "__main__":
+    table = scan()
+    print(table.head(30).to_string(index=False))
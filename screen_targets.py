@@ -0,0 +1,88 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, FIELDS, STORE_DIR
+
+# Target eligibility screener for the "average daily USD volume >= $5M" rule.
+#
+# USD volume is the candle's quote-asset volume (USDT pairs) where it is stored,
+# else close * volume. Every cached symbol is stacked into one array and summed
+# per (symbol, UTC day) with a single bincount; the average daily volume is the
+# total over the calendar days of the window, so days without trading count as zero.
+
+MIN_AVG_VOLUME_USD = 5_000_000  # $5M threshold
+ELIGIBILITY_START_MS = 1735689600000   # 2025-01-01 00:00:00 UTC
+ELIGIBILITY_END_MS = 1746748800000     # 2025-05-09 00:00:00 UTC (exclusive)
+DAY_MS = 86_400_000
+QUOTE_ASSET = "USDT"
+
+def usd_volume(values: np.ndarray) -> np.ndarray:
+    """
+    Per-candle USD volume from CandleStore values: quote_volume, falling back to
+    close * volume where quote_volume is missing.
+    """
+    quote = values[FIELDS.index("quote_volume")]
+    estimate = values[FIELDS.index("close")] * values[FIELDS.index("volume")]
+    return np.where(np.isnan(quote), estimate, quote)
+
+def daily_usd_volume(timestamps: np.ndarray, usd: np.ndarray, start_ms, end_ms,
+                     groups=None, n_groups=1) -> tuple:
+    """
+    Sums `usd` into UTC days of [start_ms, end_ms) for each group (symbol index).
+    Returns ((n_groups, days) USD totals, (n_groups, days) candle counts).
+    """
+    n_days = -(-(end_ms - start_ms) // DAY_MS)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    groups = np.zeros(len(timestamps), dtype=np.int64) if groups is None else np.asarray(groups)
+    inside = (timestamps >= start_ms) & (timestamps < end_ms)
+    cell = groups[inside] * n_days + (timestamps[inside] - start_ms) // DAY_MS
+    size = n_groups * n_days
+    totals = np.bincount(cell, weights=np.nan_to_num(usd[inside]), minlength=size)
+    counts = np.bincount(cell, minlength=size)
+    return totals.reshape(n_groups, n_days), counts.reshape(n_groups, n_days)
+
+def screen(root=STORE_DIR, interval="1h", start_ms=ELIGIBILITY_START_MS, end_ms=ELIGIBILITY_END_MS,
+           min_volume=MIN_AVG_VOLUME_USD, symbols=None, quote_asset=QUOTE_ASSET) -> pd.DataFrame:
+    """
+    Average daily USD volume of every cached `quote_asset` pair (or `symbols`) over
+    [start_ms, end_ms), ranked highest first, with an `eligible` flag for the $5M rule.
+    """
+    store = CandleStore(root)
+    if symbols is None:
+        symbols = [s for s in store.symbols(interval) if s.endswith(quote_asset)]
+    timestamps, usd, groups = [], [], []
+    for i, symbol in enumerate(symbols):
+        ts, values = store.read_range(symbol, interval, start_ms, end_ms - 1)
+        timestamps.append(ts)
+        usd.append(usd_volume(values))
+        groups.append(np.full(len(ts), i))
+
+    if symbols:
+        totals, counts = daily_usd_volume(np.concatenate(timestamps), np.concatenate(usd), start_ms, end_ms,
+                                          np.concatenate(groups), len(symbols))
+    else:
+        totals = counts = np.zeros((0, 1))
+    average = totals.mean(axis=1)
+    table = pd.DataFrame({
+        "symbol": symbols,
+        "target": [s[:-len(quote_asset)] if s.endswith(quote_asset) else s for s in symbols],
+        "avg_daily_usd_volume": average,
+        "median_daily_usd_volume": np.median(totals, axis=1),
+        "days_covered": (counts > 0).sum(axis=1),
+        "eligible": average >= min_volume,
+    })
+    order = np.argsort(-average, kind="stable")
+    return table.iloc[order].reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank cached symbols by average daily USD volume.")
+    parser.add_argument("--root", default=STORE_DIR, help="candle store directory")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--min-volume", type=float, default=MIN_AVG_VOLUME_USD)
+    parser.add_argument("--all", action="store_true", help="also list ineligible symbols")
+    args = parser.parse_args()
+
+    table = screen(args.root, args.interval, min_volume=args.min_volume)
+    print(f"✅ {table['eligible'].sum()} of {len(table)} cached symbols meet ${args.min_volume:,.0f}/day")
+    print((table if args.all else table[table["eligible"]]).to_string(index=False))
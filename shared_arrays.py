@@ -0,0 +1,49 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Read-only NumPy arrays shared with worker processes through shared memory,
+# so a process pool reads one copy of the data instead of a pickled copy each.
+
+class SharedArrays:
+    """
+    Copies named arrays into shared memory blocks owned by this process.
+    Pass `specs` to workers and call attach_arrays(specs) there.
+
+        with SharedArrays({"close": close}) as shared:
+            pool.submit(work, shared.specs)
+    """
+    def __init__(self, arrays: dict):
+        self.blocks = []
+        self.specs = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            self.blocks.append(shm)
+            self.specs[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_arrays(specs: dict):
+    """
+    Maps the blocks described by `specs` into this process as read-only arrays.
+    Returns (arrays, handles); keep `handles` alive as long as the arrays are used.
+    """
+    arrays, handles = {}, []
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[name] = arr
+        handles.append(shm)
+    return arrays, handles
@@ -0,0 +1,144 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import (
+    PERIODS_PER_YEAR, DEFAULT_FEE, DEFAULT_SLIPPAGE,
+    asset_returns, encode_signals, positions, sharpe_ratio, strategy_returns,
+)
+from shared_arrays import SharedArrays, attach_arrays
+from submission_check import EVAL_WINDOW_ROWS, generate_synthetic_candles, load_strategy, validate_metadata
+
+# Is a strategy's Sharpe ratio better than chance?
+#
+# The observed Sharpe is compared with a null distribution built from thousands
+# of resamples that break the anchor -> target relationship:
+#
+#   circular_shift   the signal series (a function of the anchor series) is rotated
+#                    against the target by a random offset, keeping its trade
+#                    frequency and clustering
+#   block_bootstrap  the target's returns are resampled in circular blocks, keeping
+#                    short-range volatility clustering, under the fixed signals
+#   permutation      the target's returns are shuffled under the fixed signals
+#
+# Each chunk of resamples is one (resamples x candles) array pass through the
+# backtest, sized to stay under CHUNK_BYTES; chunks run on a process pool that
+# reads the codes and returns from shared memory.
+# p-value = (1 + #null Sharpes >= observed) / (resamples + 1).
+
+METHODS = ("circular_shift", "block_bootstrap", "permutation")
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_BLOCK_SIZE = 24       # candles per bootstrap block (one day of 1H)
+MIN_SHIFT = 24                # smallest circular shift, so shifted signals are not near-copies
+CHUNK_BYTES = 256 * 1024 ** 2
+BYTES_PER_CELL = 40           # rough working set per (resample, candle) of one chunk
+
+def _resampled(method, codes, returns, count, rng, block_size=DEFAULT_BLOCK_SIZE, min_shift=MIN_SHIFT):
+    """
+    (positions, returns) for `count` resamples, each (count, candles) or broadcastable to it.
+    """
+    n = len(codes)
+    if method == "circular_shift":
+        low = min(min_shift, n // 2)
+        shifts = rng.integers(low, n - low + 1, count)
+        rows = (np.arange(n) - shifts[:, None]) % n
+        return positions(codes[rows]), returns
+    if method == "block_bootstrap":
+        n_blocks = -(-n // block_size)
+        starts = rng.integers(0, n, (count, n_blocks))
+        rows = (starts[:, :, None] + np.arange(block_size)).reshape(count, -1)[:, :n] % n
+    elif method == "permutation":
+        rows = rng.random((count, n)).argsort(axis=1)
+    else:
+        raise ValueError(f"❌ Unknown method: {method}. Allowed: {METHODS}")
+    return np.broadcast_to(positions(codes), (count, n)), returns[rows]
+
+def null_sharpes(method, codes, returns, count, seed, timeframe="1H", fee=DEFAULT_FEE,
+                 slippage=DEFAULT_SLIPPAGE, block_size=DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """
+    Sharpe ratios of `count` resamples, evaluated as one 2D backtest.
+    """
+    rng = np.random.default_rng(seed)
+    pos, resampled_returns = _resampled(method, codes, returns, count, rng, block_size)
+    pos = np.broadcast_to(pos, (count, len(codes)))
+    returns = strategy_returns(pos, resampled_returns, fee, slippage)
+    return sharpe_ratio(returns, PERIODS_PER_YEAR.get(timeframe, PERIODS_PER_YEAR["1H"]))
+
+_worker = {}
+
+def _init_worker(specs):
+    arrays, handles = attach_arrays(specs)
+    _worker["arrays"] = arrays
+    _worker["handles"] = handles
+
+def _null_chunk(args):
+    method, count, seed, *options = args
+    a = _worker["arrays"]
+    return null_sharpes(method, a["codes"], a["returns"], count, seed, *options)
+
+def sharpe_significance(codes, close, method="circular_shift", n_resamples=DEFAULT_RESAMPLES, timeframe="1H",
+                        fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, block_size=DEFAULT_BLOCK_SIZE,
+                        seed=0, workers=None, chunk_bytes=CHUNK_BYTES) -> dict:
+    """
+    Observed Sharpe of int8 signal `codes` on `close`, and its p-value against
+    `n_resamples` resamples of `method`. Results only depend on `seed`, not on
+    the number of workers.
+    """
+    codes = np.asarray(codes, dtype=np.int8)
+    returns = asset_returns(close)
+    periods = PERIODS_PER_YEAR.get(timeframe, PERIODS_PER_YEAR["1H"])
+    observed = float(sharpe_ratio(strategy_returns(positions(codes), returns, fee, slippage), periods))
+
+    per_chunk = max(1, chunk_bytes // (BYTES_PER_CELL * len(codes)))
+    counts = [min(per_chunk, n_resamples - i) for i in range(0, n_resamples, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    options = (timeframe, fee, slippage, block_size)
+    workers = workers if workers is not None else os.cpu_count()
+    if workers <= 1 or len(counts) == 1:
+        null = [null_sharpes(method, codes, returns, c, s, *options) for c, s in zip(counts, seeds)]
+    else:
+        with SharedArrays({"codes": codes, "returns": returns}) as shared, \
+                ProcessPoolExecutor(min(workers, len(counts)), initializer=_init_worker, initargs=(shared.specs,)) as pool:
+            null = list(pool.map(_null_chunk, [(method, c, s, *options) for c, s in zip(counts, seeds)]))
+    null = np.concatenate(null)
+
+    return {
+        "method": method,
+        "observed_sharpe": observed,
+        "p_value": float((1 + np.count_nonzero(null >= observed)) / (len(null) + 1)),
+        "null_mean": float(null.mean()),
+        "null_std": float(null.std()),
+        "null_p95": float(np.quantile(null, 0.95)),
+        "n_resamples": len(null),
+    }
+
+def strategy_significance(path="strategy.py", candles_target=None, candles_anchor=None, methods=METHODS,
+                          n_resamples=DEFAULT_RESAMPLES, seed=0, workers=None) -> pd.DataFrame:
+    """
+    Runs the strategy at `path` once and tests its Sharpe with every method.
+    Candles default to a synthetic evaluation-size window.
+    """
+    strategy = load_strategy(path)
+    metadata = validate_metadata(strategy)
+    timeframe = metadata["target"]["timeframe"]
+    if candles_target is None or candles_anchor is None:
+        candles_target, candles_anchor = generate_synthetic_candles(metadata, EVAL_WINDOW_ROWS)
+    codes = encode_signals(strategy.generate_signals(candles_target, candles_anchor)["signal"])
+    close = candles_target["close"].to_numpy(dtype=np.float64)
+    return pd.DataFrame([
+        sharpe_significance(codes, close, method, n_resamples, timeframe, seed=seed, workers=workers)
+        for method in methods
+    ])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bootstrap / permutation p-values of a strategy's Sharpe ratio.")
+    parser.add_argument("path", nargs="?", default="strategy.py")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    table = strategy_significance(args.path, n_resamples=args.resamples, seed=args.seed, workers=args.workers)
+    print(table.to_string(index=False))
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 
 # This is a strategy template for non-devs who can just change 
 # configuration values to generate a strategy file to submit to 
@@ -28,6 +29,13 @@ BUY_RULES = [
     {"symbol": "ETH", "timeframe": "1H", "lag": 4, "change_pct": 5.0, "direction": "up"}
 ]
 
+# 🧪 OPTIONAL RULE TYPES: add "type" to a rule (default "pct_change" above)
+#   "cum_return":   % change over the last `window` candles, compared with change_pct
+#   "zscore":       z-score of the anchor's candle return vs. the last `window` returns, compared with threshold
+#   "correlation":  rolling correlation of anchor and target returns over `window` candles, compared with threshold
+#   "volume_spike": anchor volume / its average over the previous `window` candles, compared with threshold
+# e.g. {"type": "zscore", "symbol": "BTC", "timeframe": "1H", "lag": 1, "window": 24, "threshold": 2.0, "direction": "up"}
+
 # ❌ SELL RULES: Define when to exit the position
 # If ANY of these rules are true, a SELL signal is triggered
 SELL_RULES = [
@@ -36,59 +44,293 @@ SELL_RULES = [
 
 # ========== STRATEGY ENGINE (DO NOT EDIT BELOW) ==========
 
+PCT_RULE_TYPES = ("pct_change", "cum_return")
+RULE_TYPES = PCT_RULE_TYPES + ("zscore", "correlation", "volume_spike")
+
+def _lagged_change(df: pd.DataFrame, col: str, lag: int, cache: dict) -> np.ndarray:
+    """
+    Returns the candle-to-candle % change of `col` shifted by `lag` candles.
+    Each (column, lag) series is computed once and shared between rules.
+    """
+    key = (col, lag)
+    if key not in cache:
+        cache[key] = df[col].pct_change().shift(lag).to_numpy(dtype=float)
+    return cache[key]
+
+def _shift(values: np.ndarray, lag: int) -> np.ndarray:
+    if lag == 0:
+        return values
+    out = np.full(values.shape, np.nan)
+    if lag < len(values):
+        out[lag:] = values[:len(values) - lag]
+    return out
+
+def _window_sums(window: int, *series) -> tuple:
+    """
+    Sums of each series over the last `window` candles (axis 0) from one
+    cumulative-sum pass each. Series may be (candles,) or (candles, targets) and
+    broadcast together. Windows containing any NaN (in any series) are NaN, like
+    pandas rolling(window).
+    """
+    shape = np.broadcast_shapes(*(values.shape for values in series))
+    valid = np.ones(shape, dtype=bool)
+    for values in series:
+        valid &= ~np.isnan(values)
+
+    def running(values):
+        out = np.zeros((shape[0] + 1,) + shape[1:])
+        np.cumsum(values, axis=0, out=out[1:])
+        return out[window:] - out[:-window]
+
+    full = np.full(shape, False)
+    full[window - 1:] = running(valid.astype(np.float64)) == window
+    sums = []
+    for values in series:
+        out = np.full(shape, np.nan)
+        out[window - 1:] = running(np.where(valid, values, 0.0))
+        out[~full] = np.nan
+        sums.append(out)
+    return tuple(sums)
+
+# Windows up to this size are computed directly from their values: running sums
+# cancel badly when a short window's spread is tiny next to its values. That
+# costs O(n * window) instead of O(n): at most 32 vectorized passes over
+# contiguous shifted slices. A Welford add/remove update would be O(n) and
+# stable too, but it is sequential per candle, i.e. a Python loop over the whole
+# history (strategies may only use numpy and pandas), which is slower than the
+# bounded direct passes at every window size that takes this path.
+DIRECT_WINDOW = 32
+_NOISE = 16 * np.finfo(np.float64).eps
+
+def _lags(values: np.ndarray, window: int) -> list:
+    """
+    The `window` series values[t - window + 1], ..., values[t] (NaN before the
+    first candle), oldest first, as contiguous slices of one padded copy.
+    """
+    padded = np.concatenate([np.full((window - 1,) + values.shape[1:], np.nan), values])
+    return [padded[i:i + len(values)] for i in range(window)]
+
+def _total(terms) -> np.ndarray:
+    # Summed in window order, so a column gives the same bits in any array shape.
+    terms = iter(terms)
+    total = np.array(next(terms), dtype=np.float64)
+    for term in terms:
+        total += term
+    return total
+
+def _spread(ss: np.ndarray, s: np.ndarray, window: int, cumulative: np.ndarray) -> np.ndarray:
+    """
+    Sum of squared deviations from running sums, ss - s * s / window. Values within
+    rounding noise of the running sums (`cumulative` sum of squares so far) are 0.
+    """
+    spread = ss - s * s / window
+    return np.where(spread > _NOISE * cumulative, spread, 0.0)
+
+def _rolling_moments(x: np.ndarray, window: int, cache: dict, key) -> tuple:
+    """
+    Rolling mean and sample std of x over `window` candles, cached so rules
+    sharing a (series, window) reuse it. Windows up to DIRECT_WINDOW are computed
+    directly in O(n * window). Longer windows use O(n) running sums of x
+    centred on its first valid value, so every result only depends on candles
+    up to its own and a longer history never changes it.
+    """
+    if key not in cache:
+        if window <= DIRECT_WINDOW:
+            lags = _lags(x, window)
+            mean = _total(lags) / window
+            var = _total((v - mean) ** 2 for v in lags) / (window - 1)
+            cache[key] = (mean, np.sqrt(var))
+        else:
+            valid = np.flatnonzero(~np.isnan(x))
+            center = x[valid[0]] if len(valid) else 0.0
+            d = x - center
+            s, ss = _window_sums(window, d, d * d)
+            var = _spread(ss, s, window, np.nancumsum(d * d, axis=0)) / (window - 1)
+            cache[key] = (s / window + center, np.sqrt(var))
+    return cache[key]
+
+def _rolling_correlation(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling correlation of returns x (candles,) with y (candles,) or (candles,
+    targets). Every target column is computed exactly as it would be on its own.
+    Long windows use O(n) running sums; returns are close to zero-mean, so they
+    need no centring.
+    """
+    if y.ndim == 2:
+        x = x[:, None]
+    both = ~(np.isnan(x) | np.isnan(y))
+    x, y = np.where(both, x, np.nan), np.where(both, y, np.nan)
+    if window <= DIRECT_WINDOW:
+        xs, ys = _lags(x, window), _lags(y, window)
+        mx, my = _total(xs) / window, _total(ys) / window
+        dx, dy = [v - mx for v in xs], [v - my for v in ys]
+        return _divide(_total(a * b for a, b in zip(dx, dy)),
+                       np.sqrt(_total(a * a for a in dx) * _total(b * b for b in dy)))
+    sx, sy, sxy, sxx, syy = _window_sums(window, x, y, x * y, x * x, y * y)
+    cov = sxy - sx * sy / window
+    xx = _spread(sxx, sx, window, np.nancumsum(x * x, axis=0))
+    yy = _spread(syy, sy, window, np.nancumsum(y * y, axis=0))
+    return _divide(cov, np.sqrt(xx * yy))
+
+def _divide(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.divide(a, b, out=np.full(a.shape, np.nan), where=b > 0)
+
+def _rule_window(rule: dict) -> int:
+    kind = rule.get('type', 'pct_change')
+    window = int(rule.get('window', 1))
+    if window < 1 or (kind in ('zscore', 'correlation') and window < 2):
+        raise ValueError(f"Rule window too small for {kind}: {window}")
+    return window
+
+def rule_series(df: pd.DataFrame, rule: dict, cache: dict) -> tuple:
+    """
+    Returns (values, present) for one rule: the indicator compared with the
+    rule's threshold, already shifted by its lag, and the candles where the
+    rule's input column is not NaN. Returns (None, None) when the rule refers
+    to a column that is not in df.
+    """
+    kind = rule.get('type', 'pct_change')
+    window = _rule_window(rule)
+    col = f"close_{rule['symbol']}_{rule['timeframe']}"
+    if kind == 'volume_spike':
+        col = f"volume_{rule['symbol']}_{rule['timeframe']}"
+    if col not in df.columns or (kind == 'correlation' and 'target_close' not in df.columns):
+        return None, None
+    present_key = ('present', col)
+    if present_key not in cache:
+        cache[present_key] = df[col].notna().to_numpy()
+    present = cache[present_key]
+
+    if kind == 'pct_change':
+        return _lagged_change(df, col, rule['lag'], cache), present
+    if kind == 'cum_return':
+        key = ('cum_return', col, window)
+        if key not in cache:
+            cache[key] = df[col].pct_change(periods=window).to_numpy(dtype=float)
+        return _shift(cache[key], rule['lag']), present
+
+    if kind == 'zscore':
+        returns = _lagged_change(df, col, 0, cache)
+        key = ('zscore', col, window)
+        if key not in cache:
+            mean, std = _rolling_moments(returns, window, cache, ('moments', col, window))
+            cache[key] = _divide(returns - mean, std)
+    elif kind == 'correlation':
+        key = ('correlation', col, window)
+        if key not in cache:
+            x = _lagged_change(df, col, 0, cache)
+            cache[key] = _rolling_correlation(x, _lagged_change(df, 'target_close', 0, cache), window)
+    elif kind == 'volume_spike':
+        key = ('volume_spike', col, window)
+        if key not in cache:
+            volume = df[col].to_numpy(dtype=float)
+            (previous,) = _window_sums(window, _shift(volume, 1))
+            cache[key] = _divide(volume, previous / window)
+    else:
+        raise ValueError(f"Unknown rule type: {kind}. Allowed: {RULE_TYPES}")
+    return _shift(cache[key], rule['lag']), present
+
+def rule_hits(change: np.ndarray, present: np.ndarray, rule: dict, side: str) -> np.ndarray:
+    """
+    Candles where one rule holds. `side` is "buy" (strict threshold) or "sell"
+    (inclusive threshold). A rule never holds where the input or value is NaN.
+    """
+    valid = present & ~np.isnan(change)
+    if rule.get('type', 'pct_change') in PCT_RULE_TYPES:
+        threshold = rule['change_pct'] / 100
+    else:
+        threshold = rule['threshold']
+    if side == "buy":
+        if rule['direction'] == 'up':
+            return valid & (change > threshold)
+        if rule['direction'] == 'down':
+            return valid & (change < threshold)
+        return valid
+    if rule['direction'] == 'down':
+        return valid & (change <= threshold)
+    if rule['direction'] == 'up':
+        return valid & (change >= threshold)
+    return np.zeros(valid.shape, dtype=bool)
+
+def compute_rule_masks(df: pd.DataFrame, buy_rules: list, sell_rules: list) -> tuple:
+    """
+    Turns BUY_RULES (all must hold) and SELL_RULES (any may fire) into boolean masks.
+    A rule is skipped on candles where its input or its lagged value is NaN.
+    """
+    n = len(df)
+    cache = {}
+
+    def hits(rule, side):
+        values, present = rule_series(df, rule, cache)
+        if values is None:
+            return None
+        return rule_hits(values, present, rule, side)
+
+    buy_mask = np.ones(n, dtype=bool)
+    for rule in buy_rules:
+        rule_mask = hits(rule, "buy")
+        if rule_mask is None:
+            buy_mask[:] = False
+            break
+        buy_mask &= rule_mask
+
+    sell_mask = np.zeros(n, dtype=bool)
+    for rule in sell_rules:
+        rule_mask = hits(rule, "sell")
+        if rule_mask is not None:
+            sell_mask |= rule_mask
+
+    return buy_mask, sell_mask
+
+def anchor_rows(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame):
+    """
+    Row of candles_anchor to use for each target candle: the last anchor row at or
+    before the target's timestamp, -1 if there is none. Returns None when both
+    share the same timestamps (or either has none), so anchor rows are used as-is.
+    """
+    if 'timestamp' not in candles_target.columns or 'timestamp' not in candles_anchor.columns:
+        return None
+    target_ts = candles_target['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    anchor_ts = candles_anchor['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if np.array_equal(target_ts, anchor_ts):
+        return None
+    return np.searchsorted(anchor_ts, target_ts, side='right') - 1
+
+def _anchor_column(candles_anchor: pd.DataFrame, col: str, rows) -> np.ndarray:
+    if col not in candles_anchor.columns:
+        raise ValueError(f"Missing required column in anchor data: {col}")
+    values = candles_anchor[col].to_numpy(dtype=float)
+    if rows is None:
+        return values
+    return np.where(rows >= 0, values[np.maximum(rows, 0)], np.nan)
+
+def _anchor_frame(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
+    """
+    The anchor columns the rules need, aligned to the target's timestamps.
+    """
+    df = candles_target[['timestamp']].copy()
+    rows = anchor_rows(candles_target, candles_anchor)
+    for anchor in ANCHORS:
+        col = f"close_{anchor['symbol']}_{anchor['timeframe']}"
+        df[col] = _anchor_column(candles_anchor, col, rows)
+
+    if any(rule.get('type') == 'volume_spike' for rule in BUY_RULES + SELL_RULES):
+        for anchor in ANCHORS:
+            col = f"volume_{anchor['symbol']}_{anchor['timeframe']}"
+            df[col] = _anchor_column(candles_anchor, col, rows)
+    return df
+
 def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
     """
     Strategy engine that applies config-driven logic to generate BUY/SELL/HOLD signals.
     """
     try:
-        df = candles_target[['timestamp']].copy()
-        for anchor in ANCHORS:
-            col = f"close_{anchor['symbol']}_{anchor['timeframe']}"
-            if col not in candles_anchor.columns:
-                raise ValueError(f"Missing required column in anchor data: {col}")
-            df[col] = candles_anchor[col].values
-
-        signals = []
-        for i in range(len(df)):
-            buy_pass = True
-            sell_pass = False
-
-            for rule in BUY_RULES:
-                col = f"close_{rule['symbol']}_{rule['timeframe']}"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    buy_pass = False
-                    break
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'up' and change <= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'down' and change >= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
-
-            for rule in SELL_RULES:
-                col = f"close_{rule['symbol']}_{rule['timeframe']}"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    continue
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    continue
-                if rule['direction'] == 'down' and change <= rule['change_pct'] / 100:
-                    sell_pass = True
-                if rule['direction'] == 'up' and change >= rule['change_pct'] / 100:
-                    sell_pass = True
-
-            if buy_pass:
-                signals.append("BUY")
-            elif sell_pass:
-                signals.append("SELL")
-            else:
-                signals.append("HOLD")
-
-        df['signal'] = signals
+        df = _anchor_frame(candles_target, candles_anchor)
+        if any(rule.get('type') == 'correlation' for rule in BUY_RULES + SELL_RULES):
+            df['target_close'] = candles_target['close'].values
+
+        buy_mask, sell_mask = compute_rule_masks(df, BUY_RULES, SELL_RULES)
+        df['signal'] = np.where(buy_mask, "BUY", np.where(sell_mask, "SELL", "HOLD"))
         return df[['timestamp', 'signal']]
 
     except Exception as e:
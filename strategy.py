@@ -21,13 +21,15 @@ def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame)
     Buy LDO if BTC or ETH pumped >2% exactly 4 hours ago using 1H data.
     """
 
-    # Merge target and anchor OHLCV data on timestamp
-    df = pd.merge(
-        candles_target[['timestamp', 'close']],
-        candles_anchor[['timestamp', 'close_BTC_1H', 'close_ETH_1H']],
-        on='timestamp',
-        how='inner'
-    )
+    # Align anchor rows to the target's timestamps: each target candle takes the
+    # last anchor row at or before it (one sorted search instead of a merge)
+    df = candles_target[['timestamp', 'close']].reset_index(drop=True)
+    target_ts = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    anchor_ts = candles_anchor['timestamp'].to_numpy(dtype='datetime64[ns]')
+    rows = np.searchsorted(anchor_ts, target_ts, side='right') - 1
+    for col in ['close_BTC_1H', 'close_ETH_1H']:
+        values = candles_anchor[col].to_numpy(dtype=float)[np.maximum(rows, 0)]
+        df[col] = np.where(rows >= 0, values, np.nan)
 
     # Calculate 4-hour-ago returns (shifted by 4 periods)
     df['btc_return_4h_ago'] = df['close_BTC_1H'].pct_change(periods=4)
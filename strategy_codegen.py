@@ -0,0 +1,49 @@
+import importlib.util
+import json
+import os
+
+# Renders config-driven strategy.py files. The engine code is read from
+# strategy-template.py so every generated strategy runs the same engine.
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategy-template.py")
+ENGINE_MARKER = "# ========== STRATEGY ENGINE (DO NOT EDIT BELOW) =========="
+
+def load_engine_source(path=TEMPLATE_PATH):
+    """
+    Returns the engine section of the template (everything below ENGINE_MARKER).
+    """
+    with open(path, 'r') as f:
+        source = f.read()
+    if ENGINE_MARKER not in source:
+        raise ValueError(f"❌ Engine marker not found in {path}")
+    return source[source.index(ENGINE_MARKER):]
+
+def load_template_module(path=TEMPLATE_PATH):
+    """
+    Imports strategy-template.py (not importable by name because of the dash)
+    so tools can reuse its rule engine.
+    """
+    spec = importlib.util.spec_from_file_location("strategy_template", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def format_list(name, items):
+    lines = json.dumps(items, indent=4).replace('true', 'True').replace('false', 'False')
+    return f"{name} = {lines}\n"
+
+def render_strategy(target_symbol, timeframe, anchors, buy_rules, sell_rules):
+    """
+    Builds the source of a self-contained strategy.py for the given config.
+    """
+    return f"""import pandas as pd
+import numpy as np
+
+# === CONFIGURATION ===
+TARGET_COIN = \"{target_symbol.upper()}\"
+TIMEFRAME = \"{timeframe}\"
+
+{format_list("ANCHORS", anchors)}
+{format_list("BUY_RULES", buy_rules)}
+{format_list("SELL_RULES", sell_rules)}
+""" + load_engine_source()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Incremental signal generation for live use.
+#
+# StreamingSignals re-implements a config-driven strategy's pct_change rules one
+# candle at a time, so a live loop does not re-run generate_signals() on the
+# whole history for every new candle. replay_check.py verifies that both give
+# the same signals.
+
+# pandas < 3 forward-fills NaN closes inside pct_change(); pandas 3 does not.
+# The streaming engine follows whichever behaviour the batch engine gets.
+_PCT_CHANGE_PADS = int(pd.__version__.split('.')[0]) < 3
+
+class StreamingSignals:
+    """
+    Incremental version of a strategy's generate_signals(). update() takes the
+    newest closed candle and returns its BUY/SELL/HOLD in O(1), keeping one ring
+    buffer of % changes per anchor column, sized to the largest configured lag.
+
+        engine = StreamingSignals.for_strategy(load_strategy("strategy.py"))
+        signal = engine.update(candle_target, candle_anchor)
+    """
+    def __init__(self, anchors, buy_rules, sell_rules):
+        self.anchors = anchors
+        self.buy_rules = buy_rules
+        self.sell_rules = sell_rules
+        for rule in self.buy_rules + self.sell_rules:
+            if rule.get('type', 'pct_change') != 'pct_change':
+                raise ValueError(f"StreamingSignals only supports pct_change rules, got: {rule['type']}")
+        self.columns = list(dict.fromkeys(f"close_{a['symbol']}_{a['timeframe']}" for a in self.anchors))
+        lags = [rule['lag'] for rule in self.buy_rules + self.sell_rules]
+        self.size = max(lags, default=0) + 1
+        self.changes = {col: np.full(self.size, np.nan) for col in self.columns}
+        self.previous = {col: np.float64(np.nan) for col in self.columns}
+        self.current = {}
+        self.count = 0
+
+    @classmethod
+    def for_strategy(cls, strategy):
+        """
+        Streams the ANCHORS / BUY_RULES / SELL_RULES of a config-driven strategy module.
+        """
+        return cls(strategy.ANCHORS, strategy.BUY_RULES, strategy.SELL_RULES)
+
+    def _push(self, col, value):
+        previous = self.previous[col]
+        if _PCT_CHANGE_PADS and np.isnan(value):
+            value = previous
+        self.changes[col][self.count % self.size] = value / previous - 1
+        self.previous[col] = value
+
+    def _change(self, rule):
+        col = f"close_{rule['symbol']}_{rule['timeframe']}"
+        if col not in self.changes or np.isnan(self.current[col]):
+            return None
+        i = self.count - 1 - rule['lag']
+        change = self.changes[col][i % self.size] if i >= 0 else np.nan
+        return None if np.isnan(change) else change
+
+    def update(self, candle_target, candle_anchor) -> str:
+        """
+        candle_target / candle_anchor are one row (dict or Series) of candles_target /
+        candles_anchor, with the anchor row already aligned to the target candle
+        (see replay_check.aligned_anchor). Returns the signal generate_signals()
+        gives that row.
+        """
+        if 'timestamp' in candle_target and 'timestamp' in candle_anchor \
+                and pd.Timestamp(candle_target['timestamp']) != pd.Timestamp(candle_anchor['timestamp']):
+            raise ValueError(f"Anchor candle at {candle_anchor['timestamp']} does not match target candle at "
+                             f"{candle_target['timestamp']}; align the anchor candles to the target timestamps first")
+        for col in self.columns:
+            if col not in candle_anchor:
+                raise ValueError(f"Missing required column in anchor data: {col}")
+            value = np.float64(candle_anchor[col])
+            self.current[col] = value
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._push(col, value)
+        self.count += 1
+
+        buy_pass = True
+        for rule in self.buy_rules:
+            change = self._change(rule)
+            threshold = rule['change_pct'] / 100
+            if change is None \
+                    or (rule['direction'] == 'up' and change <= threshold) \
+                    or (rule['direction'] == 'down' and change >= threshold):
+                buy_pass = False
+                break
+        if buy_pass:
+            return "BUY"
+
+        for rule in self.sell_rules:
+            change = self._change(rule)
+            if change is None:
+                continue
+            threshold = rule['change_pct'] / 100
+            if (rule['direction'] == 'down' and change <= threshold) \
+                    or (rule['direction'] == 'up' and change >= threshold):
+                return "SELL"
+        return "HOLD"
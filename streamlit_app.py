@@ -1,6 +1,15 @@
 import streamlit as st
-import json
-from textwrap import indent
+import numpy as np
+import pandas as pd
+from align import TimestampAligner
+from backtest import run_backtest
+from candle_store import CandleStore
+from fetch_data import fetch_ohlcv
+from strategy_codegen import load_template_module, render_strategy
+
+BINANCE_INTERVALS = {"1H": "1h", "4H": "4h", "1D": "1d"}
+RULE_TYPES = ["pct_change", "cum_return", "zscore", "correlation", "volume_spike"]
+THRESHOLD_DEFAULTS = {"zscore": 2.0, "correlation": 0.5, "volume_spike": 3.0}
 
 st.set_page_config(page_title="Lunor AI: PairWise Alpha Strategy Generator", layout="wide")
 
@@ -53,9 +62,16 @@ for i in range(num_buy):
         symbol = st.text_input(f"BUY Rule {i+1} Symbol", key=f"b_sym_{i}", value="BTC")
         tf = st.selectbox(f"BUY Rule {i+1} Timeframe", ["1H", "4H", "1D"], key=f"b_tf_{i}")
         lag = st.number_input(f"Lag (candles)", value=4, key=f"b_lag_{i}")
-        pct = st.number_input(f"% Change Required", value=2.0, key=f"b_pct_{i}")
-        direction = st.selectbox("Direction", ["up", "down"], key=f"b_dir_{i}")
-        buy_rules.append({"symbol": symbol.upper(), "timeframe": tf, "lag": lag, "change_pct": pct, "direction": direction})
+        kind = st.selectbox("Rule Type", RULE_TYPES, key=f"b_type_{i}")
+        rule = {"symbol": symbol.upper(), "timeframe": tf, "lag": lag}
+        if kind != "pct_change":
+            rule = {"type": kind, **rule, "window": st.number_input("Window (candles)", min_value=2, value=24, key=f"b_win_{i}")}
+        if kind in ("pct_change", "cum_return"):
+            rule["change_pct"] = st.number_input(f"% Change Required", value=2.0, key=f"b_pct_{i}")
+        else:
+            rule["threshold"] = st.number_input("Threshold", value=THRESHOLD_DEFAULTS[kind], key=f"b_thr_{i}")
+        rule["direction"] = st.selectbox("Direction", ["up", "down"], key=f"b_dir_{i}")
+        buy_rules.append(rule)
 
 # --- Sell Rules ---
 st.subheader("📉 SELL Rules")
@@ -66,89 +82,123 @@ for i in range(num_sell):
         symbol = st.text_input(f"SELL Rule {i+1} Symbol", key=f"s_sym_{i}", value="ETH")
         tf = st.selectbox(f"SELL Rule {i+1} Timeframe", ["1H", "4H", "1D"], key=f"s_tf_{i}")
         lag = st.number_input(f"Lag (candles)", value=0, key=f"s_lag_{i}")
-        pct = st.number_input(f"% Change Required", value=-3.0, key=f"s_pct_{i}")
-        direction = st.selectbox("Direction", ["up", "down"], key=f"s_dir_{i}")
-        sell_rules.append({"symbol": symbol.upper(), "timeframe": tf, "lag": lag, "change_pct": pct, "direction": direction})
+        kind = st.selectbox("Rule Type", RULE_TYPES, key=f"s_type_{i}")
+        rule = {"symbol": symbol.upper(), "timeframe": tf, "lag": lag}
+        if kind != "pct_change":
+            rule = {"type": kind, **rule, "window": st.number_input("Window (candles)", min_value=2, value=24, key=f"s_win_{i}")}
+        if kind in ("pct_change", "cum_return"):
+            rule["change_pct"] = st.number_input(f"% Change Required", value=-3.0, key=f"s_pct_{i}")
+        else:
+            rule["threshold"] = st.number_input("Threshold", value=THRESHOLD_DEFAULTS[kind], key=f"s_thr_{i}")
+        rule["direction"] = st.selectbox("Direction", ["up", "down"], key=f"s_dir_{i}")
+        sell_rules.append(rule)
+
+# --- Live Preview ---
+@st.cache_resource
+def load_engine():
+    return load_template_module()
+
+@st.cache_data(show_spinner=False)
+def load_candles(symbol, timeframe, start, end):
+    """
+    Candles for (symbol, timeframe, range), read through the on-disk candle store
+    so only missing ranges are ever downloaded.
+    """
+    start_ms = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ms = int(pd.Timestamp(end).timestamp() * 1000)
+    return fetch_ohlcv(f"{symbol}USDT", BINANCE_INTERVALS[timeframe], start_ms, end_ms, store=CandleStore())
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def aligned_close(symbol, timeframe, start, end, target, target_tf, field="close"):
+    """
+    Anchor closes (or another field) on the target's candles: each target candle
+    sees the last anchor candle that had closed by the time the target candle closed.
+    """
+    aligner = TimestampAligner(load_candles(target, target_tf, start, end)["timestamp"], target_tf)
+    return aligner.align(load_candles(symbol, timeframe, start, end), field, timeframe).astype(float)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def lagged_change(symbol, timeframe, lag, start, end, target, target_tf):
+    """
+    Memoized per (symbol, timeframe, lag): dragging a threshold re-uses it, and the
+    least recently used series are evicted once max_entries is reached.
+    """
+    return pd.Series(aligned_close(symbol, timeframe, start, end, target, target_tf)).pct_change().shift(lag).to_numpy()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def rule_values(symbol, timeframe, kind, window, lag, start, end, target, target_tf):
+    """
+    Indicator series of a rolling rule type, computed by the template engine on
+    the aligned anchor (and target) columns it needs. Thresholds and directions
+    are applied afterwards, so editing them re-uses the cached series.
+    """
+    prefix = f"{symbol}_{timeframe}"
+    df = pd.DataFrame({
+        f"close_{prefix}": aligned_close(symbol, timeframe, start, end, target, target_tf),
+        f"volume_{prefix}": aligned_close(symbol, timeframe, start, end, target, target_tf, "volume"),
+        "target_close": load_candles(target, target_tf, start, end)["close"].to_numpy(dtype=float),
+    })
+    rule = {"type": kind, "symbol": symbol, "timeframe": timeframe, "lag": lag, "window": window}
+    values, _ = load_engine().rule_series(df, rule, {})
+    return values
+
+def preview_signals(start, end):
+    engine = load_engine()
+    target = target_symbol.upper()
+    present = {}
+    anchor_keys = {(a["symbol"], a["timeframe"]) for a in anchors}
+
+    def hits(rule, side):
+        key = (rule["symbol"], rule["timeframe"])
+        if key not in anchor_keys:
+            return None
+        kind = rule.get("type", "pct_change")
+        # The candles where the column the rule reads is present.
+        field = "volume" if kind == "volume_spike" else "close"
+        if (key, field) not in present:
+            present[key, field] = ~np.isnan(aligned_close(*key, start, end, target, target_timeframe, field))
+        if kind == "pct_change":
+            change = lagged_change(*key, int(rule["lag"]), start, end, target, target_timeframe)
+        else:
+            change = rule_values(*key, kind, int(rule["window"]), int(rule["lag"]), start, end, target, target_timeframe)
+        return engine.rule_hits(change, present[key, field], rule, side)
+
+    candles = load_candles(target, target_timeframe, start, end)
+    buy = np.ones(len(candles), dtype=bool)
+    for rule in buy_rules:
+        rule_mask = hits(rule, "buy")
+        buy = buy & rule_mask if rule_mask is not None else np.zeros(len(candles), dtype=bool)
+    sell = np.zeros(len(candles), dtype=bool)
+    for rule in sell_rules:
+        rule_mask = hits(rule, "sell")
+        if rule_mask is not None:
+            sell |= rule_mask
+
+    signals = pd.DataFrame({
+        "timestamp": candles["timestamp"],
+        "signal": np.where(buy, "BUY", np.where(sell, "SELL", "HOLD")),
+    })
+    return signals, candles
+
+st.subheader("📊 Live Backtest Preview")
+if st.checkbox("Show backtest preview (downloads Binance candles on first use)"):
+    col_start, col_end = st.columns(2)
+    start = str(col_start.date_input("From", value=pd.Timestamp("2025-01-01")))
+    end = str(col_end.date_input("To", value=pd.Timestamp("2025-05-09")))
+    try:
+        signals, candles = preview_signals(start, end)
+        result = run_backtest(signals, candles, timeframe=target_timeframe)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Profitability", f"{result['total_return']:+.2%}")
+        m2.metric("Sharpe Ratio", f"{result['sharpe']:.2f}")
+        m3.metric("Max Drawdown", f"{result['max_drawdown']:.2%}")
+        m4.metric("Trades", result["n_trades"])
+        st.line_chart(result["equity"])
+    except Exception as e:
+        st.error(f"Preview failed: {e}")
 
 # --- Generate Python ---
-def format_list(name, items):
-    lines = json.dumps(items, indent=4).replace('true', 'True').replace('false', 'False')
-    return f"{name} = {lines}\n"
-
 if st.button("🚀 Generate strategy.py"):
-    code = f"""import pandas as pd
-
-# === CONFIGURATION ===
-TARGET_COIN = \"{target_symbol.upper()}\"
-TIMEFRAME = \"{target_timeframe}\"
-
-ANCHORS = {json.dumps(anchors, indent=4).replace('true', 'True')}
-
-BUY_RULES = {json.dumps(buy_rules, indent=4).replace('true', 'True')}
-
-SELL_RULES = {json.dumps(sell_rules, indent=4).replace('true', 'True')}
-
-# === STRATEGY ENGINE ===
-def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame) -> pd.DataFrame:
-    try:
-        df = candles_target[['timestamp']].copy()
-        for anchor in ANCHORS:
-            col = f\"close_{{anchor['symbol']}}_{{anchor['timeframe']}}\"
-            if col not in candles_anchor.columns:
-                raise ValueError(f\"Missing column: {{col}}\")
-            df[col] = candles_anchor[col].values
-
-        signals = []
-        for i in range(len(df)):
-            buy_pass = True
-            sell_pass = False
-
-            for rule in BUY_RULES:
-                col = f\"close_{{rule['symbol']}}_{{rule['timeframe']}}\"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    buy_pass = False
-                    break
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'up' and change <= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'down' and change >= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
-
-            for rule in SELL_RULES:
-                col = f\"close_{{rule['symbol']}}_{{rule['timeframe']}}\"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    continue
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    continue
-                if rule['direction'] == 'down' and change <= rule['change_pct'] / 100:
-                    sell_pass = True
-                if rule['direction'] == 'up' and change >= rule['change_pct'] / 100:
-                    sell_pass = True
-
-            if buy_pass:
-                signals.append("BUY")
-            elif sell_pass:
-                signals.append("SELL")
-            else:
-                signals.append("HOLD")
-
-        df['signal'] = signals
-        return df[['timestamp', 'signal']]
-
-    except Exception as e:
-        raise RuntimeError(f\"Strategy failed: {{e}}\")
-
-def get_coin_metadata() -> dict:
-    return {{
-        "target": {{"symbol": TARGET_COIN, "timeframe": TIMEFRAME}},
-        "anchors": [{{"symbol": a["symbol"], "timeframe": a["timeframe"]}} for a in ANCHORS]
-    }}
-"""
+    code = render_strategy(target_symbol, target_timeframe, anchors, buy_rules, sell_rules)
     st.code(code, language="python")
-    st.download_button("📥 Download strategy.py", data=code, file_name="strategy.py", mime="text/x-python")
+    st.download_button("📥 Download strategy.py", data=code, file_name="strategy.py", mime="text/x-python")
\ No newline at end of file
@@ -1,10 +1,23 @@
 import pandas as pd
+import numpy as np
+import argparse
+import ast
 import importlib.util
+import multiprocessing
 import os
+import re
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from anchor_panel import build_anchor_panel, to_ms
+from backtest import run_backtest, format_report
+from candle_store import CandleStore, STORE_DIR
+import instrumentation
+from screen_targets import DAY_MS, MIN_AVG_VOLUME_USD, QUOTE_ASSET, daily_usd_volume, screen
 
 ALLOWED_SIGNALS = {"BUY", "SELL", "HOLD"}
 ALLOWED_IMPORTS = {"pandas", "numpy"}
-MIN_AVG_VOLUME_USD = 5_000_000  # $5M threshold
 
 def load_strategy(path='strategy.py'):
     if not os.path.exists(path):
@@ -15,16 +28,78 @@ def load_strategy(path='strategy.py'):
     spec.loader.exec_module(strategy)
     return strategy
 
-def validate_imports(path='strategy.py'):
+def _parse(path):
     with open(path, 'r') as f:
-        lines = f.readlines()
+        return ast.parse(f.read(), filename=path)
 
-    for line in lines:
-        if line.strip().startswith("import"):
-            for part in line.replace("import", "").split(","):
-                lib = part.strip().split(" ")[0]
-                if lib not in ALLOWED_IMPORTS:
-                    raise ImportError(f"❌ External library '{lib}' is not allowed. Only 'pandas' and 'numpy' are permitted.")
+def validate_imports(path='strategy.py'):
+    for node in ast.walk(_parse(path)):
+        if isinstance(node, ast.Import):
+            libs = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            libs = ["." * node.level + (node.module or "")]
+        else:
+            continue
+        for lib in libs:
+            if lib.split(".")[0] not in ALLOWED_IMPORTS:
+                raise ImportError(f"❌ External library '{lib}' is not allowed. Only 'pandas' and 'numpy' are permitted.")
+
+COLUMN_PATTERN = re.compile(r"^(open|high|low|close|volume)_([A-Za-z0-9]+)_(1H|4H|1D)$")
+FIELD_PREFIX_PATTERN = re.compile(r"^(open|high|low|close|volume)_")
+
+def _string_prefix(node):
+    """
+    Constant leading text of an f-string or of a `"..." + x` concatenation.
+    """
+    if isinstance(node, ast.JoinedStr) and node.values and isinstance(node.values[0], ast.Constant):
+        return node.values[0].value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        if isinstance(node.left, ast.Constant) and isinstance(node.left.value, str):
+            return node.left.value
+        return _string_prefix(node.left)
+    return None
+
+def analyze_columns(path='strategy.py') -> dict:
+    """
+    Statically finds the anchor columns a strategy reads.
+    "columns": literal `<field>_<SYM>_<TF>` names as (field, symbol, timeframe);
+    "dynamic_fields": fields whose column names are built at runtime (f-strings,
+    concatenation), which may refer to any anchor in the metadata.
+    """
+    columns, dynamic_fields = set(), set()
+    for node in ast.walk(_parse(path)):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            match = COLUMN_PATTERN.match(node.value)
+            if match:
+                columns.add(match.groups())
+        prefix = _string_prefix(node)
+        if prefix is not None and not COLUMN_PATTERN.match(prefix):
+            match = FIELD_PREFIX_PATTERN.match(prefix)
+            if match:
+                dynamic_fields.add(match.group(1))
+    return {"columns": columns, "dynamic_fields": dynamic_fields}
+
+def validate_column_references(references: dict, metadata: dict):
+    declared = {(a["symbol"], a["timeframe"]) for a in metadata["anchors"]}
+    undeclared = sorted(f"{f}_{s}_{tf}" for f, s, tf in references["columns"] if (s, tf) not in declared)
+    if undeclared:
+        anchors_str = ", ".join(f"{s}:{tf}" for s, tf in sorted(declared))
+        raise ValueError(
+            f"❌ Strategy reads {', '.join(undeclared)} but get_coin_metadata() only declares anchors {anchors_str}. "
+            "Every anchor symbol and timeframe used in the signal logic must be listed in the metadata."
+        )
+    print(f"✅ Column references match metadata ({len(references['columns'])} literal, "
+          f"{len(references['dynamic_fields'])} dynamic field(s)).")
+
+def required_anchor_columns(references: dict, metadata: dict):
+    """
+    Columns the anchor loader has to materialize, or None when nothing could be
+    found statically and the full panel is needed.
+    """
+    columns = {f"{f}_{s}_{tf}" for f, s, tf in references["columns"]}
+    for field in references["dynamic_fields"]:
+        columns.update(f"{field}_{a['symbol']}_{a['timeframe']}" for a in metadata["anchors"])
+    return sorted(columns) or None
 
 def generate_dummy_ohlcv(symbol, timeframe="1H", rows=30):
     ts = pd.date_range("2025-01-01", periods=rows, freq=timeframe)
@@ -40,42 +115,21 @@ def generate_dummy_ohlcv(symbol, timeframe="1H", rows=30):
 
 
 #Generate dummy anchor data
-import pandas as pd
-
-def generate_dummy_anchor_data(symbols: list, rows: int = 50) -> pd.DataFrame:
+def generate_dummy_anchor_data(symbols: list, rows: int = 50, columns=None) -> pd.DataFrame:
     ts = pd.date_range("2025-01-01", periods=rows, freq="1H")
-    df = pd.DataFrame({"timestamp": ts})
+    base = {}
 
     for anchor_metadata in symbols:
-        symbol = anchor_metadata['symbol']
-        timeframe = anchor_metadata['timeframe']
-        
-        base_close = [1.0 + 0.01 * i for i in range(rows)]
-        base_volume = [5_000_000 / (1.0 + 0.01 * i) for i in range(rows)]
-
-        # 1H data
-        df[f"open_{symbol}_{timeframe}"] = 1.0
-        df[f"high_{symbol}_{timeframe}"] = 1.02
-        df[f"low_{symbol}_{timeframe}"] = 0.98
-        df[f"close_{symbol}_{timeframe}"] = base_close
-        df[f"volume_{symbol}_{timeframe}"] = base_volume
-
-        # 4H data (sparse) - assuming 1H base data is available
-        if timeframe == "1H":
-            df[f"open_{symbol}_4H"] = df[f"open_{symbol}_{timeframe}"].where(df.index % 4 == 0)
-            df[f"high_{symbol}_4H"] = df[f"high_{symbol}_{timeframe}"].where(df.index % 4 == 0)
-            df[f"low_{symbol}_4H"] = df[f"low_{symbol}_{timeframe}"].where(df.index % 4 == 0)
-            df[f"close_{symbol}_4H"] = df[f"close_{symbol}_{timeframe}"].where(df.index % 4 == 0)
-            df[f"volume_{symbol}_4H"] = df[f"volume_{symbol}_{timeframe}"].where(df.index % 4 == 0)
-
-            # 1D data (sparse) - assuming 1H base data is available
-            df[f"open_{symbol}_1D"] = df[f"open_{symbol}_{timeframe}"].where(df.index % 24 == 0)
-            df[f"high_{symbol}_1D"] = df[f"high_{symbol}_{timeframe}"].where(df.index % 24 == 0)
-            df[f"low_{symbol}_1D"] = df[f"low_{symbol}_{timeframe}"].where(df.index % 24 == 0)
-            df[f"close_{symbol}_1D"] = df[f"close_{symbol}_{timeframe}"].where(df.index % 24 == 0)
-            df[f"volume_{symbol}_1D"] = df[f"volume_{symbol}_{timeframe}"].where(df.index % 24 == 0)
+        base[anchor_metadata['symbol']] = pd.DataFrame({
+            "open": np.full(rows, 1.0),
+            "high": np.full(rows, 1.02),
+            "low": np.full(rows, 0.98),
+            "close": 1.0 + 0.01 * np.arange(rows),
+            "volume": 5_000_000 / (1.0 + 0.01 * np.arange(rows))
+        })
 
-    return df
+    # 1H base candles aggregated to 4H and 1D; higher timeframes only show closed bars
+    return build_anchor_panel(ts, base, columns=columns)
 
 
 ALLOWED_ANCHORS = {"BTC", "ETH", "SOL"}
@@ -87,48 +141,108 @@ def validate_anchors(anchors):
             raise ValueError(f"❌ Invalid anchor symbol: {symbol}. Allowed: {ALLOWED_ANCHORS}")
     print("✅ Anchor symbols are valid.")
 
-def run_check():
+def validate_metadata(strategy) -> dict:
+    if not hasattr(strategy, "generate_signals"):
+        raise AttributeError("❌ Missing required function: generate_signals()")
+
+    if not hasattr(strategy, "get_coin_metadata"):
+        raise AttributeError("❌ Missing required function: get_coin_metadata()")
+
+    metadata = strategy.get_coin_metadata()
+    if "target" not in metadata or "anchors" not in metadata:
+        raise ValueError("❌ Metadata must include 'target' and 'anchors' keys")
+
+    target = metadata["target"]
+    if "symbol" not in target or "timeframe" not in target:
+        raise ValueError("❌ 'target' must contain 'symbol' and 'timeframe'")
+
+    for anchor in metadata["anchors"]:
+        if "symbol" not in anchor or "timeframe" not in anchor:
+            raise ValueError("❌ Each anchor must contain 'symbol' and 'timeframe'")
+
+    return metadata
+
+def validate_signals(signals, candles_target):
+    if len(signals) == 0:
+        raise ValueError("❌ generate_signals() returned an empty DataFrame")
+
+    if not isinstance(signals, pd.DataFrame):
+        raise TypeError("❌ generate_signals() must return a pandas DataFrame")
+
+    if 'timestamp' not in signals.columns or 'signal' not in signals.columns:
+        raise ValueError("❌ Output must contain 'timestamp' and 'signal' columns")
+
+    if len(signals) != len(candles_target):
+        raise ValueError("❌ Output length mismatch: signals must match length of candles_target")
+
+    invalid = [s for s in signals['signal'] if s not in ALLOWED_SIGNALS]
+    if invalid:
+        raise ValueError(f"❌ Invalid signal values found: {set(invalid)}")
+
+def average_daily_volume(symbol, candles_target, root=STORE_DIR):
+    """
+    Average daily USD volume of the target over the eligibility window when its
+    1h candles are cached, else over the UTC days spanned by `candles_target`.
+    Returns (volume, description of the data used).
+    """
+    pair = f"{symbol.upper()}{QUOTE_ASSET}"
+    if CandleStore(root).has(pair, "1h"):
+        volume = screen(root, symbols=[pair])["avg_daily_usd_volume"].iloc[0]
+        return volume, f"cached {pair} candles, Jan 1 – May 9 2025"
+    ts = to_ms(candles_target["timestamp"])
+    usd = (candles_target["volume"] * candles_target["close"]).to_numpy(dtype=float)
+    first_day = ts[0] // DAY_MS * DAY_MS
+    totals, _ = daily_usd_volume(ts, usd, first_day, ts[-1] + 1)
+    return totals.mean(), "dummy OHLCV"
+
+def run_check(path='strategy.py'):
     print("🔍 Running submission checks...")
 
     try:
-        strategy = load_strategy()
-        validate_imports()
-
-        if not hasattr(strategy, "generate_signals"):
-            raise AttributeError("❌ Missing required function: generate_signals()")
-
-        if not hasattr(strategy, "get_coin_metadata"):
-            raise AttributeError("❌ Missing required function: get_coin_metadata()")
-
-        metadata = strategy.get_coin_metadata()
-        if "target" not in metadata or "anchors" not in metadata:
-            raise ValueError("❌ Metadata must include 'target' and 'anchors' keys")
-
+        with instrumentation.stage("load strategy"):
+            strategy = instrumentation.instrument(load_strategy(path))
+        with instrumentation.stage("validate metadata"):
+            validate_imports(path)
+            metadata = validate_metadata(strategy)
         target = metadata["target"]
-        if "symbol" not in target or "timeframe" not in target:
-            raise ValueError("❌ 'target' must contain 'symbol' and 'timeframe'")
-
-        for anchor in metadata["anchors"]:
-            if "symbol" not in anchor or "timeframe" not in anchor:
-                raise ValueError("❌ Each anchor must contain 'symbol' and 'timeframe'")
 
         print(f"✅ Metadata OK: Target={target['symbol']} | Anchors={[a['symbol'] for a in metadata['anchors']]}")
 
         validate_anchors(metadata['anchors'])
 
-        candles_target = generate_dummy_ohlcv(target["symbol"], target["timeframe"])
-        candles_anchor = generate_dummy_anchor_data(metadata["anchors"])
+        with instrumentation.stage("column analysis"):
+            references = analyze_columns(path)
+            validate_column_references(references, metadata)
+            columns = required_anchor_columns(references, metadata)
+
+        with instrumentation.stage("dummy data"):
+            candles_target = generate_dummy_ohlcv(target["symbol"], target["timeframe"])
+            candles_anchor = generate_dummy_anchor_data(metadata["anchors"], columns=columns)
 
         # 💰 Volume check
-        candles_target["usd_volume"] = candles_target["volume"] * candles_target["close"]
-        avg_usd_vol = candles_target["usd_volume"].mean()
+        with instrumentation.stage("volume check"):
+            avg_usd_vol, source = average_daily_volume(target["symbol"], candles_target)
         if avg_usd_vol < MIN_AVG_VOLUME_USD:
-            print(f"❌ Avg daily USD volume = ${avg_usd_vol:,.2f} — must be ≥ $5,000,000.")
+            print(f"❌ Avg daily USD volume = ${avg_usd_vol:,.2f} ({source}) — must be ≥ $5,000,000.")
         else:
-            print(f"✅ Avg daily USD volume = ${avg_usd_vol:,.2f} (meets requirement)")
+            print(f"✅ Avg daily USD volume = ${avg_usd_vol:,.2f} ({source}, meets requirement)")
 
         try:
-            signals = strategy.generate_signals(candles_target, candles_anchor)
+            try:
+                with instrumentation.stage("generate_signals"):
+                    signals = strategy.generate_signals(candles_target, candles_anchor)
+            except Exception as projected_error:
+                if columns is None:
+                    raise
+                # Static analysis can miss names built in unusual ways: retry on the full panel.
+                candles_anchor = generate_dummy_anchor_data(metadata["anchors"])
+                try:
+                    with instrumentation.stage("generate_signals", retry="full panel"):
+                        signals = strategy.generate_signals(candles_target, candles_anchor)
+                except Exception:
+                    raise projected_error
+                print("⚠️ Static column analysis missed a column; using the full anchor panel.")
+                columns = None
         except Exception as e:
             error_message = str(e)
             if any(keyword in error_message for keyword in ["KeyError", "not found", "not in index", "close_", "close"]):
@@ -155,27 +269,295 @@ def run_check():
                 raise e
 
 
-        if len(signals) == 0:
-            raise ValueError("❌ generate_signals() returned an empty DataFrame")
-
-        if not isinstance(signals, pd.DataFrame):
-            raise TypeError("❌ generate_signals() must return a pandas DataFrame")
-
-        if 'timestamp' not in signals.columns or 'signal' not in signals.columns:
-            raise ValueError("❌ Output must contain 'timestamp' and 'signal' columns")
-
-        if len(signals) != len(candles_target):
-            raise ValueError("❌ Output length mismatch: signals must match length of candles_target")
+        validate_signals(signals, candles_target)
+        print("✅ Signals are correctly formatted and aligned.")
 
-        invalid = [s for s in signals['signal'] if s not in ALLOWED_SIGNALS]
-        if invalid:
-            raise ValueError(f"❌ Invalid signal values found: {set(invalid)}")
+        with instrumentation.stage("backtest"):
+            result = run_backtest(signals, candles_target, timeframe=target["timeframe"])
+        print(f"📊 Backtest (dummy data): {format_report(result)}")
 
-        print("✅ Signals are correctly formatted and aligned.")
+        with instrumentation.stage("determinism and leak check"):
+            check_determinism_and_leaks(path, *generate_synthetic_candles(metadata, EVAL_WINDOW_ROWS, columns=columns))
         print("✅ All checks passed! Submission is valid. 🎉")
 
     except Exception as e:
         print(str(e))
 
+BENCHMARK_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+EVAL_WINDOW_ROWS = 3_100         # ~1H candles in the evaluation window
+TIME_BUDGET_S = 60.0
+MEMORY_BUDGET_MB = 2_048.0
+TRACED_TIME_FACTOR = 10        # tracemalloc slows generate_signals() down several-fold
+
+def generate_synthetic_candles(metadata: dict, rows: int, seed: int = 0, columns=None):
+    """
+    Random-walk 1H OHLCV for the target and every anchor in metadata, with the
+    anchor panel built the same way as the evaluation data (1H, 4H, 1D columns).
+    """
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2020-01-01", periods=rows, freq="1h")
+
+    def random_walk():
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+        spread = np.abs(rng.normal(0, 0.005, rows))
+        return pd.DataFrame({
+            "open": np.r_[close[0], close[:-1]],
+            "high": close * (1 + spread),
+            "low": close * (1 - spread),
+            "close": close,
+            "volume": rng.lognormal(12, 1, rows)
+        })
+
+    candles_target = random_walk()
+    candles_target.insert(0, "timestamp", ts)
+    symbols = dict.fromkeys(a["symbol"] for a in metadata["anchors"])
+    candles_anchor = build_anchor_panel(ts, {s: random_walk() for s in symbols}, columns=columns)
+    return candles_target, candles_anchor
+
+def projected_columns(strategy, metadata: dict, columns, rows: int = 1_000):
+    """
+    `columns` when generate_signals() runs on synthetic candles projected to them,
+    otherwise None (the full anchor panel): like run_check(), fall back when
+    static analysis missed a column built in an unusual way.
+    """
+    if columns is None:
+        return None
+    try:
+        strategy.generate_signals(*generate_synthetic_candles(metadata, rows, columns=columns))
+        return columns
+    except Exception:
+        print("⚠️ Static column analysis missed a column; using the full anchor panel.")
+        return None
+
+def _benchmark_one(path, metadata, rows, columns, time_budget_s, conn):
+    try:
+        strategy = load_strategy(path)
+        candles_target, candles_anchor = generate_synthetic_candles(metadata, rows, columns=columns)
+        conn.send(("start", None))
+        start = time.perf_counter()
+        strategy.generate_signals(candles_target, candles_anchor)
+        elapsed = time.perf_counter() - start
+        conn.send(("seconds", elapsed))
+        if elapsed > time_budget_s:
+            conn.send(("peak_mb", np.nan))
+            return
+
+        # Separate traced run so tracemalloc overhead does not skew the timing.
+        # A profiler may already be tracing, so measure from the current baseline.
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        strategy.generate_signals(candles_target, candles_anchor)
+        conn.send(("peak_mb", (tracemalloc.get_traced_memory()[1] - baseline) / 1e6))
+        if not tracing:
+            tracemalloc.stop()
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+def _benchmark_size(path, metadata, rows, columns, time_budget_s) -> dict:
+    """
+    Runs one size in a worker process and kills it once generate_signals() has
+    run for longer than the time budget, so a slow strategy cannot stall the
+    benchmark at the larger sizes. The traced memory run gets TRACED_TIME_FACTOR
+    times the budget; past that its peak is reported as NaN (peak_timed_out).
+    """
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_benchmark_one, args=(path, metadata, rows, columns, time_budget_s, child),
+                                   daemon=True)
+    proc.start()
+    child.close()
+    result = {"rows": rows, "seconds": np.nan, "peak_mb": np.nan, "timed_out": False, "peak_timed_out": False}
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not parent.poll(timeout):
+                if np.isnan(result["seconds"]):
+                    result.update(seconds=time_budget_s, timed_out=True)
+                else:
+                    result["peak_timed_out"] = True
+                return result
+            try:
+                kind, value = parent.recv()
+            except EOFError:
+                raise RuntimeError(f"❌ Benchmark worker for {rows:,} rows exited with code {proc.exitcode}")
+            if kind == "error":
+                raise RuntimeError(f"❌ generate_signals() failed on {rows:,} rows: {value}")
+            if kind == "start":
+                deadline = time.monotonic() + time_budget_s
+            elif kind == "seconds":
+                result["seconds"] = value
+                deadline = time.monotonic() + TRACED_TIME_FACTOR * time_budget_s
+            else:
+                result["peak_mb"] = value
+                return result
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        parent.close()
+
+def run_benchmark(path='strategy.py', sizes=BENCHMARK_SIZES, time_budget_s=TIME_BUDGET_S,
+                  memory_budget_mb=MEMORY_BUDGET_MB):
+    """
+    Times generate_signals() and records its peak traced memory on synthetic data of
+    each size, fits runtime ~ rows^k, and fails if any size exceeds the budgets.
+    Each size runs in its own process under a wall-clock limit of the time budget;
+    the benchmark stops at the first size over either budget.
+    """
+    print("⏱️ Running performance benchmark...")
+    strategy = load_strategy(path)
+    metadata = strategy.get_coin_metadata()
+    columns = projected_columns(strategy, metadata, required_anchor_columns(analyze_columns(path), metadata))
+    results = []
+
+    for rows in sizes:
+        with instrumentation.stage("benchmark size", rows=rows):
+            result = _benchmark_size(path, metadata, rows, columns, time_budget_s)
+        results.append(result)
+        if result["timed_out"]:
+            print(f"  {rows:>9,} rows: stopped after {time_budget_s:.2f}s")
+            break
+        peak = "traced run timed out" if result["peak_timed_out"] else f"{result['peak_mb']:8.1f} MB"
+        print(f"  {rows:>9,} rows: {result['seconds']:8.3f}s | peak {peak}")
+        if result["seconds"] > time_budget_s or result["peak_mb"] > memory_budget_mb:
+            break
+
+    table = pd.DataFrame(results)
+    finished = table[~table["timed_out"]]
+    if len(finished) >= 2:
+        exponent, intercept = np.polyfit(np.log(finished["rows"]), np.log(np.maximum(finished["seconds"], 1e-6)), 1)
+        projected = np.exp(intercept) * EVAL_WINDOW_ROWS ** exponent
+        print(f"📈 Scaling: runtime ~ rows^{exponent:.2f} (projected {projected:.3f}s for {EVAL_WINDOW_ROWS:,} rows)")
+        if exponent > 1.5:
+            print("⚠️ Runtime grows faster than linearly; check for per-row loops over the full history.")
+
+    over_time = table[table["timed_out"] | (table["seconds"] > time_budget_s)]
+    over_memory = table[table["peak_mb"] > memory_budget_mb]
+    if len(over_time) or len(over_memory):
+        for row in over_time.itertuples():
+            if row.timed_out:
+                print(f"❌ {row.rows:,} rows did not finish within the {time_budget_s:.2f}s budget")
+            else:
+                print(f"❌ {row.rows:,} rows took {row.seconds:.2f}s (budget {time_budget_s:.2f}s)")
+        for row in over_memory.itertuples():
+            print(f"❌ {row.rows:,} rows peaked at {row.peak_mb:.1f} MB (budget {memory_budget_mb:.1f} MB)")
+        raise RuntimeError("❌ Strategy exceeds the performance budget.")
+
+    print("✅ Strategy is within the time and memory budget.")
+    return table
+
+LEAK_CHECK_POINTS = 16
+LEAK_CHECK_SEED = 0
+
+def truncation_points(rows: int, n_points: int = LEAK_CHECK_POINTS, seed: int = LEAK_CHECK_SEED) -> list:
+    """
+    Stratified schedule of prefix lengths: one random cut inside each of
+    `n_points` equal-width strata, so every part of the history is probed
+    with a fixed number of strategy calls.
+    """
+    rng = np.random.default_rng(seed)
+    edges = np.linspace(1, rows, n_points + 1)
+    cuts = {int(rng.integers(int(lo), max(int(hi), int(lo) + 1))) for lo, hi in zip(edges[:-1], edges[1:])}
+    return sorted(c for c in cuts if 1 <= c < rows)
+
+_leak_worker = {}
+
+def _init_leak_worker(path, candles_target, candles_anchor):
+    _leak_worker["strategy"] = load_strategy(path)
+    _leak_worker["target"] = candles_target
+    _leak_worker["anchor"] = candles_anchor
+
+def _prefix_signals(cut):
+    candles_target = _leak_worker["target"]
+    candles_anchor = _leak_worker["anchor"]
+    last_ts = candles_target["timestamp"].iloc[cut - 1]
+    anchor_rows = np.searchsorted(candles_anchor["timestamp"].to_numpy(), last_ts.to_datetime64(), side="right")
+    signals = _leak_worker["strategy"].generate_signals(
+        candles_target.iloc[:cut].copy(), candles_anchor.iloc[:anchor_rows].copy()
+    )
+    return cut, signals[["timestamp", "signal"]]
+
+def check_determinism_and_leaks(path, candles_target, candles_anchor, n_points=LEAK_CHECK_POINTS, workers=None):
+    """
+    Runs generate_signals() twice on the full data and requires byte-identical
+    output, then re-runs it on sampled prefixes in a process pool. A prefix whose
+    signals differ from the full run means the strategy used later candles.
+    With workers <= 1 the prefixes run in this process.
+    """
+    strategy = load_strategy(path)
+    first = strategy.generate_signals(candles_target.copy(), candles_anchor.copy())
+    second = strategy.generate_signals(candles_target.copy(), candles_anchor.copy())
+    if first.to_csv(index=False).encode() != second.to_csv(index=False).encode():
+        raise ValueError("❌ generate_signals() is not deterministic: two runs on the same candles differ.")
+    print("✅ Signals are deterministic.")
+
+    full = pd.Series(first["signal"].to_numpy(), index=first["timestamp"].to_numpy())
+    cuts = truncation_points(len(candles_target), n_points)
+    workers = workers if workers is not None else min(os.cpu_count(), len(cuts))
+    if workers <= 1:
+        # In this process, e.g. when already running inside a sandboxed worker.
+        _init_leak_worker(path, candles_target, candles_anchor)
+        prefixes = [_prefix_signals(cut) for cut in cuts]
+        _leak_worker.clear()
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_leak_worker,
+                                 initargs=(path, candles_target, candles_anchor)) as pool:
+            prefixes = list(pool.map(_prefix_signals, cuts))
+
+    first_leak = None
+    for cut, signals in prefixes:
+        expected = full.reindex(signals["timestamp"].to_numpy()).to_numpy()
+        diff = np.flatnonzero(signals["signal"].to_numpy() != expected)
+        if len(diff):
+            ts = signals["timestamp"].iloc[diff[0]]
+            if first_leak is None or ts < first_leak[0]:
+                first_leak = (ts, cut, expected[diff[0]], signals["signal"].iloc[diff[0]])
+
+    if first_leak is not None:
+        ts, cut, full_signal, prefix_signal = first_leak
+        raise ValueError(
+            f"❌ Future leak: signal at {ts} is {full_signal} with the full history but "
+            f"{prefix_signal} when the data ends after candle {cut}."
+        )
+    print(f"✅ No future leak found across {len(cuts)} truncation points.")
+
 if __name__ == "__main__":
-    run_check()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Validate a PairWise Alpha strategy.")
+    parser.add_argument("path", nargs="?", default="strategy.py")
+    parser.add_argument("--benchmark", action="store_true", help="time generate_signals() at several data sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES))
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET_S, help="seconds allowed per size")
+    parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET_MB, help="peak MB allowed per size")
+    parser.add_argument("--profile", default=None, help="write per-stage timings and counters to this JSON file")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace (chrome://tracing, Perfetto) to this file")
+    parser.add_argument("--track-memory", action="store_true", help="record allocations per stage (slower)")
+    args = parser.parse_args()
+
+    if args.profile or args.trace:
+        instrumentation.enable(track_memory=args.track_memory)
+
+    failed = False
+    if args.benchmark:
+        try:
+            run_benchmark(args.path, args.sizes, args.time_budget, args.memory_budget)
+        except Exception as e:
+            print(str(e))
+            failed = True
+    else:
+        run_check(args.path)
+
+    profiler = instrumentation.disable()
+    if profiler is not None:
+        if args.profile:
+            profiler.to_json(args.profile)
+            print(f"📝 Profile written to {args.profile}")
+        if args.trace:
+            profiler.to_chrome_trace(args.trace)
+            print(f"📝 Trace written to {args.trace}")
+    if failed:
+        sys.exit(1)
\ No newline at end of file
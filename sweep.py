@@ -0,0 +1,148 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import BUY, SELL, DEFAULT_FEE, DEFAULT_SLIPPAGE, backtest_codes
+from shared_arrays import SharedArrays, attach_arrays
+from strategy_codegen import load_template_module, render_strategy
+
+# Batched parameter sweep over BUY rule configurations.
+#
+# For every swept anchor the lagged returns are computed once as a
+# (lags x candles) matrix, then turned into one boolean BUY mask per
+# (lag, change_pct) cell. A config picks one cell per anchor; its BUY mask is
+# the AND of those rows, so whole chunks of configs are evaluated as 2D array
+# operations and scored with backtest.backtest_codes().
+
+DEFAULT_LAGS = range(0, 49)
+DEFAULT_CHANGE_PCTS = (0.5, 1.0, 1.5, 2.0, 3.0, 5.0)
+CHUNK_SIZE = 2048
+METRICS = ("total_return", "sharpe", "max_drawdown", "n_trades", "exposure")
+
+def lagged_return_matrix(close: pd.Series, lags) -> np.ndarray:
+    """
+    Row k holds close.pct_change().shift(lags[k]), exactly as the template engine computes it.
+    """
+    change = close.pct_change().to_numpy(dtype=float)
+    matrix = np.full((len(lags), len(change)), np.nan)
+    for k, lag in enumerate(lags):
+        if lag < len(change):
+            matrix[k, lag:] = change[:len(change) - lag]
+    return matrix
+
+def rule_cell_masks(close: pd.Series, lags, change_pcts, direction) -> np.ndarray:
+    """
+    BUY masks for every (lag, change_pct) cell of one anchor, shape (lags * pcts, candles).
+    Uses the engine's semantics: the rule fails where the close or its change is NaN.
+    """
+    matrix = lagged_return_matrix(close, lags)
+    valid = close.notna().to_numpy() & ~np.isnan(matrix)
+    thresholds = np.asarray(change_pcts, dtype=float)[None, :, None] / 100
+    if direction == "up":
+        hit = matrix[:, None, :] > thresholds
+    else:
+        hit = matrix[:, None, :] < thresholds
+    return (hit & valid[:, None, :]).reshape(len(lags) * len(change_pcts), -1)
+
+def _evaluate_chunk(masks, sell_mask, close, shape, start, stop, timeframe, fee, slippage):
+    combos = np.unravel_index(np.arange(start, stop), shape)
+    buy = np.ones((stop - start, masks.shape[-1]), dtype=bool)
+    for anchor, rows in enumerate(combos):
+        buy &= masks[anchor][rows]
+    codes = buy.astype(np.int8) * BUY
+    codes[~buy & sell_mask] = SELL
+    return backtest_codes(codes, close, timeframe, fee, slippage)
+
+_worker = {}
+
+def _init_worker(specs):
+    arrays, handles = attach_arrays(specs)
+    _worker["arrays"] = arrays
+    _worker["handles"] = handles
+
+def _evaluate_shared(args):
+    a = _worker["arrays"]
+    return args[0], _evaluate_chunk(a["masks"], a["sell_mask"], a["close"], *args[1:])
+
+def sweep(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame, anchors: list,
+          lags=DEFAULT_LAGS, change_pcts=DEFAULT_CHANGE_PCTS, sell_rules=(), timeframe="1H",
+          fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, rank_by="sharpe", top=20, workers=None,
+          chunk_size=CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Evaluates every combination of (lag, change_pct) across `anchors`, each given as
+    {"symbol", "timeframe", "direction"}. BUY needs all anchor rules to hold; the
+    fixed `sell_rules` use the template's SELL semantics. Returns the `top`
+    configs ranked by `rank_by` (max_drawdown ranks ascending).
+    """
+    lags = list(lags)
+    change_pcts = list(change_pcts)
+    masks = np.stack([
+        rule_cell_masks(candles_anchor[f"close_{a['symbol']}_{a['timeframe']}"], lags, change_pcts, a["direction"])
+        for a in anchors
+    ])
+    engine = load_template_module()
+    sell_frame = candles_anchor[list({f"close_{r['symbol']}_{r['timeframe']}" for r in sell_rules})]
+    _, sell_mask = engine.compute_rule_masks(sell_frame, [], list(sell_rules))
+    close = candles_target["close"].to_numpy(dtype=np.float64)
+
+    shape = (masks.shape[1],) * len(anchors)
+    total = int(np.prod(shape))
+    chunks = [(i, min(i + chunk_size, total)) for i in range(0, total, chunk_size)]
+    tail = (timeframe, fee, slippage)
+    results = {m: np.empty(total) for m in METRICS}
+
+    workers = workers if workers is not None else os.cpu_count()
+    if workers <= 1 or len(chunks) == 1:
+        for start, stop in chunks:
+            scores = _evaluate_chunk(masks, sell_mask, close, shape, start, stop, *tail)
+            for m in METRICS:
+                results[m][start:stop] = scores[m]
+    else:
+        with SharedArrays({"masks": masks, "sell_mask": sell_mask, "close": close}) as shared, \
+                ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared.specs,)) as pool:
+            jobs = [(start, shape, start, stop, *tail) for start, stop in chunks]
+            for start, scores in pool.map(_evaluate_shared, jobs):
+                for m in METRICS:
+                    results[m][start:start + len(scores[m])] = scores[m]
+
+    order = np.argsort(results[rank_by] if rank_by == "max_drawdown" else -results[rank_by], kind="stable")[:top]
+    combos = np.unravel_index(order, shape)
+    table = pd.DataFrame({m: results[m][order] for m in METRICS})
+    for k, (anchor, rows) in enumerate(zip(anchors, combos)):
+        prefix = f"{anchor['symbol']}_{anchor['timeframe']}"
+        table.insert(2 * k, f"lag_{prefix}", np.asarray(lags)[rows // len(change_pcts)])
+        table.insert(2 * k + 1, f"pct_{prefix}", np.asarray(change_pcts)[rows % len(change_pcts)])
+    return table
+
+def best_rules(table: pd.DataFrame, anchors: list, row=0) -> list:
+    """
+    Converts one row of a sweep() table back into BUY_RULES.
+    """
+    best = table.iloc[row]
+    rules = []
+    for a in anchors:
+        prefix = f"{a['symbol']}_{a['timeframe']}"
+        rules.append({
+            "symbol": a["symbol"],
+            "timeframe": a["timeframe"],
+            "lag": int(best[f"lag_{prefix}"]),
+            "change_pct": float(best[f"pct_{prefix}"]),
+            "direction": a["direction"],
+        })
+    return rules
+
+def export_strategy(table: pd.DataFrame, anchors: list, target_symbol, timeframe="1H", sell_rules=(),
+                    path="strategy.py", row=0):
+    """
+    Writes the config of the given sweep() row as a ready-to-submit strategy.py.
+    """
+    buy_rules = best_rules(table, anchors, row)
+    columns = {(r["symbol"], r["timeframe"]): r["lag"] for r in itertools.chain(buy_rules, sell_rules)}
+    anchor_list = [{"symbol": s, "timeframe": tf, "lag": lag} for (s, tf), lag in columns.items()]
+    code = render_strategy(target_symbol, timeframe, anchor_list, buy_rules, list(sell_rules))
+    with open(path, "w") as f:
+        f.write(code)
+    print(f"✅ Wrote {path}")
+    return code
@@ -0,0 +1,134 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fetch_data
+from candle_store import CandleStore
+
+# Runs the fetcher against a local stub of /api/v3/klines that serves a
+# synthetic 1h series and records every request it gets.
+
+HOUR_MS = 3_600_000
+LISTED_MS = 1_700_000_000_000 // HOUR_MS * HOUR_MS
+N_CANDLES = 3_000
+
+def kline(open_ms):
+    i = (open_ms - LISTED_MS) // HOUR_MS
+    price = 100.0 + i
+    return [open_ms, str(price), str(price + 1), str(price - 1), str(price + 0.5), "10.0",
+            open_ms + HOUR_MS - 1, "1000.0", 5, "4.0", "400.0", "0"]
+
+@pytest.fixture
+def stub():
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(query)
+            start, limit = int(query["startTime"]), int(query["limit"])
+            end = int(query.get("endTime", 2**62))
+            first = max(LISTED_MS, -(-start // HOUR_MS) * HOUR_MS)
+            last = min(end, LISTED_MS + (N_CANDLES - 1) * HOUR_MS)
+            body = json.dumps([kline(t) for t in range(first, last + 1, HOUR_MS)][:limit]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v3/klines", requests_seen
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(fetch_data.time, "sleep", lambda seconds: None)
+
+def expected_opens(start_ms, end_ms):
+    return pd.to_datetime(np.arange(start_ms, end_ms + 1, HOUR_MS), unit="ms")
+
+def test_interval_names_are_case_sensitive():
+    assert fetch_data.interval_ms("1m") == 60_000
+    assert fetch_data.interval_ms("1w") == 7 * 86_400_000
+    for name in ("1M", "1H", "2D"):
+        with pytest.raises(ValueError):
+            fetch_data.interval_ms(name)
+
+def test_paginates_the_whole_window(stub):
+    url, seen = stub
+    end = LISTED_MS + 2_499 * HOUR_MS
+    df = fetch_data.fetch_ohlcv("ABCUSDT", "1h", LISTED_MS, end, api_url=url)
+    assert (df["timestamp"] == expected_opens(LISTED_MS, end)).all()
+    assert df["close"].iloc[-1] == 100.0 + 2_499 + 0.5
+    assert len(seen) == 3
+
+def test_parallel_pages_match_sequential(stub):
+    url, seen = stub
+    end = LISTED_MS + 2_499 * HOUR_MS
+    parallel = fetch_data.fetch_ohlcv_parallel("ABCUSDT", "1h", LISTED_MS, end, max_workers=4, api_url=url)
+    sequential = fetch_data.fetch_ohlcv("ABCUSDT", "1h", LISTED_MS, end, api_url=url)
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+def test_resumes_from_the_cached_tail(stub, tmp_path):
+    url, seen = stub
+    store = CandleStore(str(tmp_path))
+    middle, end = LISTED_MS + 999 * HOUR_MS, LISTED_MS + 2_499 * HOUR_MS
+    fetch_data.fetch_ohlcv("ABCUSDT", "1h", LISTED_MS, middle, api_url=url, store=store)
+    seen.clear()
+
+    df = fetch_data.fetch_ohlcv("ABCUSDT", "1h", LISTED_MS, end, api_url=url, store=store)
+    assert (df["timestamp"] == expected_opens(LISTED_MS, end)).all()
+    # Only the tail is downloaded again, starting at the last cached candle.
+    assert int(seen[0]["startTime"]) == middle
+    assert all(int(q["startTime"]) >= middle for q in seen)
+
+    # A fully cached window at most refreshes its last candle.
+    seen.clear()
+    fetch_data.fetch_ohlcv("ABCUSDT", "1h", LISTED_MS, end, api_url=url, store=store)
+    assert all(int(q["startTime"]) >= end for q in seen)
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_range_before_listing_is_not_requested_again(stub, tmp_path, parallel):
+    url, seen = stub
+    store = CandleStore(str(tmp_path))
+    window = {"abc": ("ABCUSDT", "1h")}
+    start, end = LISTED_MS - 500 * HOUR_MS, LISTED_MS + 199 * HOUR_MS
+
+    # A start between candles is not evidence of a later listing.
+    unaligned = pd.to_datetime([LISTED_MS + 100 * HOUR_MS + HOUR_MS // 2, end], unit="ms")
+    fetch_data.fetch_all(window, *unaligned, parallel=parallel, api_url=url, store=store)
+    assert store.earliest("ABCUSDT", "1h") is None
+    listed = pd.to_datetime([LISTED_MS, end], unit="ms")
+    data = fetch_data.fetch_all(window, *listed, parallel=parallel, api_url=url, store=store)
+    assert (data["abc"]["timestamp"] == expected_opens(LISTED_MS, end)).all()
+    assert store.earliest("ABCUSDT", "1h") is None
+
+    dates = pd.to_datetime([start, end], unit="ms")
+    data = fetch_data.fetch_all(window, *dates, parallel=parallel, api_url=url, store=store)
+    assert (data["abc"]["timestamp"] == expected_opens(LISTED_MS, end)).all()
+    assert store.earliest("ABCUSDT", "1h") == LISTED_MS
+
+    seen.clear()
+    fetch_data.fetch_all(window, *dates, parallel=parallel, api_url=url, store=store)
+    assert all(int(q["startTime"]) >= end for q in seen)
+
+def test_gap_at_the_start_is_not_a_listing_date(stub, tmp_path):
+    url, seen = stub
+    store = CandleStore(str(tmp_path))
+    # A head range whose start returns nothing, yet the symbol was listed long before it.
+    fetch_data._store_klines(store, "ABCUSDT", "1h", LISTED_MS + 10 * HOUR_MS, LISTED_MS + 19 * HOUR_MS,
+                             [kline(LISTED_MS + 15 * HOUR_MS)], api_url=url)
+    assert store.earliest("ABCUSDT", "1h") is None
+    assert store.missing_ranges("ABCUSDT", "1h", LISTED_MS, LISTED_MS + 15 * HOUR_MS)[0][0] == LISTED_MS
@@ -0,0 +1,61 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+import ingest_archives
+from candle_store import CandleStore
+
+# Builds small Binance-style kline archives and ingests them into a temporary store.
+
+HOUR_MS = 3_600_000
+HEADER = "open_time,open,high,low,close,volume,close_time,quote_volume,count,taker_buy_volume,taker_buy_quote_volume,ignore"
+
+def month_ms(year, month):
+    return int(pd.Timestamp(year, month, 1).value // 1_000_000)
+
+def kline_rows(open_times_ms):
+    return np.array([[t, 100 + i, 101 + i, 99 + i, 100.5 + i, 10 + i, t + HOUR_MS - 1, 1000 + i, 5, 4, 400, 0]
+                     for i, t in enumerate(open_times_ms)], dtype=np.float64)
+
+def write_archive(directory, name, rows, header=False, microseconds=False):
+    lines = [HEADER] if header else []
+    for row in rows:
+        open_time, close_time = int(row[0]), int(row[6])
+        if microseconds:
+            open_time, close_time = open_time * 1000, close_time * 1000
+        lines.append(",".join([str(open_time), *map(str, row[1:6]), str(close_time), *map(str, row[7:])]))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(name.replace(".zip", ".csv"), "\n".join(lines) + "\n")
+    (directory / name).write_bytes(buffer.getvalue())
+
+def test_ingests_archives_once(tmp_path, capsys):
+    archives, root = tmp_path / "archives", str(tmp_path / "store")
+    archives.mkdir()
+    jan = np.arange(month_ms(2024, 1), month_ms(2024, 2), HOUR_MS)
+    feb = np.arange(month_ms(2024, 2), month_ms(2024, 3), HOUR_MS)
+    listed = np.arange(month_ms(2025, 3) + 10 * 86_400_000, month_ms(2025, 4), HOUR_MS)
+    write_archive(archives, "AAAUSDT-1h-2024-01.zip", kline_rows(jan))
+    write_archive(archives, "AAAUSDT-1h-2024-02.zip", kline_rows(feb), header=True)
+    # The listing month is partial, and 2025 spot archives hold microsecond open times.
+    write_archive(archives, "BBBUSDT-1h-2025-03.zip", kline_rows(listed), microseconds=True)
+    write_archive(archives, "CCCUSDT-1mo-2024-01.zip", kline_rows(jan[:1]))
+
+    summary = ingest_archives.ingest_directory(str(archives), root, workers=1).set_index("symbol")
+    assert "unsupported interval 1mo" in capsys.readouterr().out
+    assert list(summary.index) == ["AAAUSDT", "BBBUSDT"]
+    assert summary.loc["AAAUSDT", "archives"] == 2 and summary.loc["BBBUSDT", "archives"] == 1
+
+    store = CandleStore(root)
+    timestamps, values = store.load("AAAUSDT", "1h")
+    np.testing.assert_array_equal(timestamps, np.concatenate([jan, feb]))
+    rows = np.concatenate([kline_rows(jan), kline_rows(feb)])
+    np.testing.assert_array_equal(values, rows[:, [1, 2, 3, 4, 5, 7]].T)
+    timestamps, values = store.load("BBBUSDT", "1h")
+    np.testing.assert_array_equal(timestamps, listed)
+    np.testing.assert_array_equal(values[3], kline_rows(listed)[:, 4])
+
+    again = ingest_archives.ingest_directory(str(archives), root, workers=1)
+    assert again["archives"].sum() == 0
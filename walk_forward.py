@@ -0,0 +1,170 @@
+import argparse
+import copy
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import HOLD, DEFAULT_FEE, DEFAULT_SLIPPAGE, backtest_codes, encode_signals
+from batch_check import attach_candles, share_candles
+from submission_check import EVAL_WINDOW_ROWS, generate_synthetic_candles, load_strategy, validate_metadata
+
+# Walk-forward evaluation of a strategy file.
+#
+# The candles are split into rolling (train, test) folds. On each train window
+# every BUY_RULES candidate is run through the strategy's own generate_signals()
+# and scored; the best one is then scored on the following, unseen test window.
+# Folds run on a process pool whose workers all map the same read-only
+# shared-memory candles, so memory does not grow with folds or workers.
+# Strategies without a BUY_RULES config are scored as-is on every test window.
+
+TRAIN_ROWS = 1_440     # 60 days of 1H candles
+TEST_ROWS = 336        # 14 days of 1H candles
+DEFAULT_LAGS = (1, 2, 4, 8, 12, 24)
+DEFAULT_CHANGE_PCTS = (0.5, 1.0, 2.0, 3.0, 5.0)
+METRICS = ("total_return", "sharpe", "max_drawdown", "n_trades", "exposure")
+
+def fold_bounds(n_rows, train_rows=TRAIN_ROWS, test_rows=TEST_ROWS, step=None) -> list:
+    """
+    (train_start, test_start, test_end) row bounds of every complete rolling fold.
+    Consecutive test windows tile the data when step == test_rows (the default).
+    """
+    step = step or test_rows
+    return [(start, start + train_rows, start + train_rows + test_rows)
+            for start in range(0, n_rows - train_rows - test_rows + 1, step)]
+
+def rule_grid(buy_rules, lags=DEFAULT_LAGS, change_pcts=DEFAULT_CHANGE_PCTS) -> list:
+    """
+    Every combination of (lag, change_pct) across the rules. Each rule keeps its
+    symbol, timeframe and direction, and the sign of its change_pct; rules
+    without a change_pct (threshold rule types) only vary their lag.
+    """
+    choices = []
+    for rule in buy_rules:
+        if "change_pct" in rule:
+            sign = -1.0 if rule["change_pct"] < 0 else 1.0
+            choices.append([{**rule, "lag": lag, "change_pct": sign * pct} for lag in lags for pct in change_pcts])
+        else:
+            choices.append([{**rule, "lag": lag} for lag in lags])
+    return [list(combo) for combo in itertools.product(*choices)]
+
+_worker = {}
+
+def _init_worker(path, specs, anchor_columns):
+    candles_target, candles_anchor, handles = attach_candles(specs, anchor_columns)
+    _worker.update(strategy=load_strategy(path), target=candles_target, anchor=candles_anchor, handles=handles)
+
+def _init_pool_worker(*initargs):
+    # Slices of the shared candles are read-only; copy-on-write keeps strategies from writing to them.
+    pd.set_option("mode.copy_on_write", True)
+    _init_worker(*initargs)
+
+def _codes(strategy, candles_target, candles_anchor, buy_rules=None):
+    if buy_rules is not None:
+        strategy.BUY_RULES = buy_rules
+    signals = strategy.generate_signals(candles_target, candles_anchor)
+    return encode_signals(signals["signal"])
+
+def _run_fold(args):
+    fold, (train_start, test_start, test_end), grid, rank_by, timeframe, fee, slippage = args
+    strategy = _worker["strategy"]
+    target, anchor = _worker["target"], _worker["anchor"]
+    close = target["close"].to_numpy()
+    original = copy.deepcopy(getattr(strategy, "BUY_RULES", None))
+    result = {"fold": fold, "train_start": train_start, "test_start": test_start, "test_end": test_end}
+    try:
+        best = None
+        if grid:
+            train_t, train_a = target.iloc[train_start:test_start], anchor.iloc[train_start:test_start]
+            codes = np.stack([_codes(strategy, train_t, train_a, rules) for rules in grid])
+            scores = backtest_codes(codes, close[train_start:test_start], timeframe, fee, slippage)[rank_by]
+            # max_drawdown ranks ascending; NaN scores (e.g. no trades) never win.
+            pick = int(np.argmax(np.nan_to_num(-scores if rank_by == "max_drawdown" else scores, nan=-np.inf)))
+            best = grid[pick]
+            result["buy_rules"] = best
+            result[f"train_{rank_by}"] = float(scores[pick])
+
+        # Signals are generated from the start of the train window so lagged rules
+        # have their history, but only the test rows are scored.
+        codes = _codes(strategy, target.iloc[train_start:test_end], anchor.iloc[train_start:test_end], best)
+        test_codes = codes[test_start - train_start:]
+        metrics = backtest_codes(test_codes, close[test_start:test_end], timeframe, fee, slippage)
+        result.update({m: float(metrics[m]) for m in METRICS})
+    finally:
+        if original is not None:
+            strategy.BUY_RULES = original
+    return result, test_codes
+
+def walk_forward(path="strategy.py", candles_target=None, candles_anchor=None, train_rows=TRAIN_ROWS,
+                 test_rows=TEST_ROWS, step=None, grid=None, rank_by="sharpe", fee=DEFAULT_FEE,
+                 slippage=DEFAULT_SLIPPAGE, workers=None) -> tuple:
+    """
+    Runs every fold of the strategy at `path` in parallel. `grid` lists BUY_RULES
+    candidates and defaults to rule_grid() around the strategy's own BUY_RULES.
+    Returns (per-fold table, overall stats of the stitched out-of-sample signals).
+    """
+    strategy = load_strategy(path)
+    metadata = validate_metadata(strategy)
+    timeframe = metadata["target"]["timeframe"]
+    if candles_target is None or candles_anchor is None:
+        candles_target, candles_anchor = generate_synthetic_candles(metadata, EVAL_WINDOW_ROWS)
+    if grid is None:
+        grid = rule_grid(strategy.BUY_RULES) if hasattr(strategy, "BUY_RULES") else []
+    bounds = fold_bounds(len(candles_target), train_rows, test_rows, step)
+    if not bounds:
+        raise ValueError(f"❌ Need at least {train_rows + test_rows} candles for one fold, got {len(candles_target)}")
+
+    tasks = [(i, b, grid, rank_by, timeframe, fee, slippage) for i, b in enumerate(bounds)]
+    workers = min(workers or os.cpu_count(), len(tasks))
+    shared, anchor_columns = share_candles(candles_target, candles_anchor)
+    with shared:
+        initargs = (path, shared.specs, anchor_columns)
+        if workers <= 1:
+            # Same copy-on-write mode as the pool workers, without changing the caller's pandas options.
+            with pd.option_context("mode.copy_on_write", True):
+                _init_worker(*initargs)
+                try:
+                    results = [_run_fold(t) for t in tasks]
+                finally:
+                    _worker.clear()
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_pool_worker, initargs=initargs) as pool:
+                results = list(pool.map(_run_fold, tasks))
+
+    folds = pd.DataFrame([r for r, _ in results])
+    timestamps = candles_target["timestamp"].reset_index(drop=True)
+    folds["test_end"] -= 1   # last test candle, inclusive
+    for col in ("train_start", "test_start", "test_end"):
+        folds[col] = timestamps[folds[col]].to_numpy()
+
+    # Overall: one out-of-sample signal series over the span of all test windows.
+    first, last = bounds[0][1], bounds[-1][2]
+    oos = np.full(last - first, HOLD, dtype=np.int8)
+    for (_, test_start, test_end), (_, codes) in zip(bounds, results):
+        oos[test_start - first:test_end - first] = codes
+    close = candles_target["close"].to_numpy(dtype=np.float64)[first:last]
+    metrics = backtest_codes(oos, close, timeframe, fee, slippage)
+    overall = {m: float(metrics[m]) for m in METRICS}
+    overall.update({
+        "folds": len(folds),
+        "positive_folds": float((folds["total_return"] > 0).mean()),
+        "fold_sharpe_mean": float(folds["sharpe"].mean()),
+        "fold_sharpe_std": float(folds["sharpe"].std(ddof=0)),
+    })
+    return folds, overall
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward evaluation of a strategy file.")
+    parser.add_argument("path", nargs="?", default="strategy.py")
+    parser.add_argument("--train", type=int, default=TRAIN_ROWS, help="candles per train window")
+    parser.add_argument("--test", type=int, default=TEST_ROWS, help="candles per test window")
+    parser.add_argument("--rank-by", default="sharpe", choices=METRICS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    folds, overall = walk_forward(args.path, train_rows=args.train, test_rows=args.test,
+                                  rank_by=args.rank_by, workers=args.workers)
+    print(folds.drop(columns=["buy_rules"], errors="ignore").to_string(index=False))
+    print(f"📊 Out-of-sample: Profitability={overall['total_return']:+.2%} | Sharpe={overall['sharpe']:.2f} | "
+          f"MaxDD={overall['max_drawdown']:.2%} | Positive folds={overall['positive_folds']:.0%}")